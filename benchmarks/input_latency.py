@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from os.path import abspath, dirname, join
+from typing import Dict, List
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import QMetaObject, Qt
+from PyQt5.QtWidgets import QApplication
+
+import test_recorder
+from scaner.packet import load_layout
+from slok_test.event_bus import PRIORITY_CRITICAL
+from slok_test.manager import Experiment
+from slok_test.schedule import compile_session, load_protocol
+from slok_test.tracing import histogram
+from slok_test.window import MainWindow
+
+STAGES = ['socket_receive', 'signal_delivery', 'dispatch', 'experiment', 'total']
+
+
+class InputLatencyBenchmark:
+    def __init__(self, window: MainWindow, experiment: Experiment, port: int, count: int, interval: float) -> None:
+        self.window = window
+        self.experiment = experiment
+        self.port = port
+        self.count = count
+        self.interval = interval
+        self.layout = load_layout('scaner')
+
+        self.samples: Dict[str, List[int]] = {stage: [] for stage in STAGES}
+        self.handled = threading.Event()
+        self.send_time = 0
+        self.received_time = 0
+        self.dispatch_time = 0
+
+        # 각 단계 사이에 시각 측정용 wrapper 삽입
+        events = window.events
+        events.scaner_connector.onPress.disconnect()
+        events.scaner_connector.onPress.connect(self.measure_dispatch)
+        events.onKeyPress.unsubscribe(experiment.receive_input)
+        events.onKeyPress.subscribe(self.measure_experiment, priority=PRIORITY_CRITICAL)
+
+        self.prepare_cue()
+
+    def prepare_cue(self):
+        self.window.timer.stop()
+        # 매번 첫 시행의 자극을 다시 표시
+        self.experiment.trial_index = 0
+        self.experiment.current_test_type = self.experiment.schedule.exp_type(0)
+        self.experiment.show_cue()
+
+    def measure_dispatch(self, key: Qt.Key, timestamp: int):
+        self.dispatch_time = time.perf_counter_ns()
+        self.received_time = timestamp
+        self.window.events.simulinkActivatedEvent(key, timestamp)
+
+    def measure_experiment(self, e):
+        start = time.perf_counter_ns()
+        self.experiment.receive_input(e)
+        end = time.perf_counter_ns()
+
+        self.samples['socket_receive'].append(self.received_time - self.send_time)
+        self.samples['signal_delivery'].append(self.dispatch_time - self.received_time)
+        self.samples['dispatch'].append(start - self.dispatch_time)
+        self.samples['experiment'].append(end - start)
+        self.samples['total'].append(end - self.send_time)
+
+        # 다음 입력을 위해 다시 자극 표시 상태로
+        self.prepare_cue()
+        self.handled.set()
+
+    def send(self):
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        press = self.layout.encode(size=128, hm_key=1.0, sw_key=999.0)
+        release = self.layout.encode(size=128, hm_key=0.0, sw_key=999.0)
+
+        time.sleep(0.5)
+        for _ in range(self.count):
+            self.handled.clear()
+            self.send_time = time.perf_counter_ns()
+            sender.sendto(press, ('127.0.0.1', self.port))
+            if not self.handled.wait(2):
+                print('Benchmark: press was not handled, stopping')
+                break
+
+            time.sleep(self.interval / 2)
+            sender.sendto(release, ('127.0.0.1', self.port))
+            time.sleep(self.interval / 2)
+
+        sender.close()
+        QMetaObject.invokeMethod(QApplication.instance(), 'quit', Qt.ConnectionType.QueuedConnection)
+
+    def report(self) -> Dict:
+        return {stage: histogram(samples) for stage, samples in self.samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='UDP press -> Experiment.receive_input latency benchmark')
+    parser.add_argument('--count', type=int, default=200)
+    parser.add_argument('--interval', type=float, default=0.05, help='seconds between presses')
+    parser.add_argument('--port', type=int, default=2222)
+    parser.add_argument('--output', default=join(ROOT, 'bench_results'))
+    args = parser.parse_args()
+
+    # 실험 결과 파일이 섞이지 않도록 임시 폴더에 기록
+    os.chdir(ROOT)
+    result_dir = tempfile.mkdtemp(prefix='slok-bench-')
+    test_recorder.configure(result_dir, join(result_dir, 'result.xlsx'))
+
+    app = QApplication(sys.argv)
+    window = MainWindow(port=args.port)
+    experiment = Experiment(window, 'benchmark', schedule=compile_session(load_protocol(), 0))
+    benchmark = InputLatencyBenchmark(window, experiment, args.port, args.count, args.interval)
+
+    sender = threading.Thread(target=benchmark.send, daemon=True)
+    sender.start()
+    app.exec_()
+    window.events.scaner_connector.deactivate()
+
+    result = {
+        'date': datetime.now().isoformat(),
+        'platform': QApplication.platformName(),
+        'count': args.count,
+        'interval': args.interval,
+        'stages': benchmark.report(),
+    }
+
+    os.makedirs(args.output, exist_ok=True)
+    path = join(args.output, f"input_latency-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(result, file, indent=2)
+
+    for stage in STAGES:
+        stats = result['stages'][stage]
+        if stats['count'] > 0:
+            print(f"{stage:>16}: p50 {stats['p50_us']:9.1f} us  p99 {stats['p99_us']:9.1f} us  max {stats['max_us']:9.1f} us")
+    print(f'Saved: {path}')
+
+
+if __name__ == '__main__':
+    main()
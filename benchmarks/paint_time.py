@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from os.path import abspath, dirname, join
+from typing import Dict, List
+
+ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import QPoint
+from PyQt5.QtGui import QColor, QPainter, QPaintEvent
+from PyQt5.QtWidgets import QApplication
+
+from slok_test.exp_setting import LUMINANCE_TEST_SET, SIZE_TEST_SET
+from slok_test.tracing import histogram
+from slok_test.window import MainWindow
+
+# 자극 표시/깜빡임 한 번의 repaint 시간 비교
+# legacy: 전체 창 paintEvent에서 원을 매번 새로 그리던 이전 방식
+# cached: 원 영역만 다시 그리고 미리 그려둔 pixmap 복사
+
+
+def stimuli() -> List[tuple]:
+    return [(160, alpha) for alpha in LUMINANCE_TEST_SET] + [(radius, 63) for radius in SIZE_TEST_SET]
+
+
+def measure(repaint, count: int) -> List[int]:
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter_ns()
+        repaint()
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stimulus repaint time benchmark')
+    parser.add_argument('--count', type=int, default=200)
+    parser.add_argument('--output', default=join(ROOT, 'bench_results'))
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.events.scaner_connector.deactivate()
+    for widget in window.widgets.values():
+        widget.setVisible(False)
+
+    image = window.image
+    legacy_color = QColor(255, 255, 255, 255)
+
+    def legacy_paint(a0: QPaintEvent):
+        painter = QPainter(window)
+        painter.setBrush(legacy_color)
+        painter.drawEllipse(image.pos() + QPoint(image.radius, image.radius), image.radius, image.radius)
+        painter.end()
+
+    samples: Dict[str, List[int]] = {'legacy': [], 'cached': []}
+    for radius, alpha in stimuli():
+        image.setSize(radius)
+        image.setBrightness(alpha)
+        legacy_color.setAlpha(alpha)
+        app.processEvents()
+
+        image.setVisible(False)
+        window.paintEvent = legacy_paint
+        samples['legacy'] += measure(window.repaint, args.count)
+
+        del window.paintEvent
+        image.setVisible(True)
+        app.processEvents()
+        samples['cached'] += measure(image.repaint, args.count)
+
+    result = {
+        'date': datetime.now().isoformat(),
+        'platform': QApplication.platformName(),
+        'window': [window.width(), window.height()],
+        'count': args.count,
+        'paint': {name: histogram(values) for name, values in samples.items()},
+    }
+
+    os.makedirs(args.output, exist_ok=True)
+    path = join(args.output, f"paint_time-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(result, file, indent=2)
+
+    for name, stats in result['paint'].items():
+        print(f"{name:>8}: p50 {stats['p50_us']:9.1f} us  p99 {stats['p99_us']:9.1f} us  max {stats['max_us']:9.1f} us")
+    print(f'Saved: {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import json
+import os
+from os.path import basename, dirname, isfile, join
+from typing import Any, Callable, Union
+
+# yaml 설정 파일을 읽어서 변환한 결과를 같은 폴더의 __pycache__에 JSON으로 저장
+# 파일이 바뀌면 (mtime, 크기) 다시 변환, 변환할 때만 yaml을 import (yaml import만 수십 ms)
+
+
+def cache_path(path: str) -> str:
+    return join(dirname(path), '__pycache__', basename(path) + '.json')
+
+
+def load_yaml(path: str) -> Any:
+    import yaml
+
+    with open(path, encoding='utf-8') as file:
+        return yaml.load(file, Loader=yaml.FullLoader)
+
+
+def load_cached(path: str, compile: Union[Callable[[Any], Any], None] = None) -> Any:
+    # compile: yaml 내용 -> 저장할 형태 (JSON으로 저장 가능해야 함)
+    stat = os.stat(path)
+    stamp = [stat.st_mtime_ns, stat.st_size]
+    compiled_path = cache_path(path)
+
+    if isfile(compiled_path):
+        try:
+            with open(compiled_path, encoding='utf-8') as file:
+                cached = json.load(file)
+            if cached['source'] == stamp:
+                return cached['data']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    data = load_yaml(path)
+    if compile is not None:
+        data = compile(data)
+
+    try:
+        os.makedirs(dirname(compiled_path) or '.', exist_ok=True)
+        temp_path = compiled_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'source': stamp, 'data': data}, file, ensure_ascii=False)
+        os.replace(temp_path, compiled_path)
+    except OSError:
+        # 저장하지 못해도 다음 실행에서 다시 변환하면 됨
+        pass
+
+    return data
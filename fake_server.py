@@ -1,6 +1,11 @@
 import socket
 import time
-import struct
+
+from scaner.packet import load_layout
+
+# SCANeR 대신 버튼 신호를 보내는 테스트 서버, 패킷 구조는 scaner/packet.yaml 기준
+# 실제 SCANeR 패킷 재전송은 python -m scaner.capture replay 사용
+layout = load_layout('scaner')
 
 server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
 server.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
@@ -16,14 +21,14 @@ while True:
             data_2 = 0
         else:
             data_2 = 1
-            
+
         count = 0
 
-    message = struct.pack('d', data_1) + struct.pack('d', data_2)
+    message = layout.encode(size=128, hm_key=data_1, sw_key=data_2)
     # print(list(message))
 
     server.sendto(message, ('<broadcast>', 2222))
-    print(f'Sended: {message}')
-    
+    print(f'Sended: {layout.decode(message)}')
+
     count += 1
-    time.sleep(0.1)
\ No newline at end of file
+    time.sleep(0.1)
@@ -1,13 +1,70 @@
 import sys
+import time
 
+# python main.py --profile-startup : 시작 단계별 소요 시간 출력
+STARTUP = time.perf_counter_ns()
+
+
+class StartupProfile:
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.last = STARTUP
+        self.stages = []
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter_ns()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def report(self) -> None:
+        if not self.enabled:
+            return
+
+        print('Startup profile:')
+        for stage, elapsed in self.stages:
+            print(f'  {stage:<28} {elapsed / 1000000:8.1f} ms')
+        print(f"  {'total':<28} {(self.last - STARTUP) / 1000000:8.1f} ms")
+
+        # 각 단계에서 새로 import된 모듈 (yaml, openpyxl 등이 시작 시 로드되는지 확인)
+        for module in ['yaml', 'openpyxl', 'numpy', 'sqlite3', 'scaner.connector']:
+            print(f"  {module:<28} {'loaded' if module in sys.modules else 'not loaded'}")
+
+
+profile = StartupProfile('--profile-startup' in sys.argv)
+if profile.enabled:
+    sys.argv.remove('--profile-startup')
+
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication
-from slok_test.manager import initialize_experiment
+profile.mark('import PyQt5')
 
+import test_recorder
+from slok_test.exp_setting import RENDER_BACKEND, SOFTWARE_OPENGL
+from slok_test.manager import initialize_experiment
 from slok_test.window import MainWindow
+profile.mark('import slok_test')
 
 if __name__ == '__main__':
+    if RENDER_BACKEND == 'opengl':
+        from slok_test.gl_circle import configure_opengl
+        configure_opengl(SOFTWARE_OPENGL)
+
     app = QApplication(sys.argv)
+    profile.mark('QApplication')
+
     exp = MainWindow()
     exp.events.onSubmit.append(initialize_experiment)
+    profile.mark('MainWindow')
+
+    # 첫 시행을 기록할 때 GUI 스레드에서 만들지 않도록 미리 시작
+    test_recorder.get_writer()
+    profile.mark('RecordWriter')
+
+    # 이벤트 루프가 처음 돌아 창이 그려진 뒤
+    def first_frame():
+        profile.mark('first event loop pass')
+        profile.report()
+
+    QTimer.singleShot(0, first_frame)
 
-    app.exec_()
\ No newline at end of file
+    app.exec_()
@@ -0,0 +1,230 @@
+import argparse
+import csv
+import math
+from os.path import join
+from typing import Dict, List
+
+import numpy as np
+
+from recorder.sqlite_store import SqliteStore
+
+# 저장된 전체 시행을 배열로 읽어 피험자 x 실험 종류 x 값 별로 반응 시간 통계 계산
+# python -m recorder.analysis [--db results/results.db] [--output results/analysis]
+
+# 초 단위
+ANTICIPATORY_THRESHOLD = 0.1
+MISS_THRESHOLD = 2.0
+# 절사 평균에서 양쪽에서 버리는 비율
+TRIM_RATIO = 0.1
+# |x - median| > MAD_THRESHOLD * 1.4826 * MAD 이면 이상치
+MAD_THRESHOLD = 3.0
+MAD_SCALE = 1.4826
+
+CHUNK_SIZE = 65536
+
+# Piéron 곡선 RT = r0 + k * value^-beta 의 beta 탐색 범위
+PIERON_BETAS = np.linspace(0.05, 3.0, 60)
+CURVE_TYPES = ['LUMINANCE', 'SIZE']
+
+
+class TrialArrays:
+    # 피험자, 실험 종류는 번호로 저장하고 이름은 subjects / experiments에서 찾음
+    def __init__(self, subjects: List[str], experiments: List[str], subject: np.ndarray, experiment: np.ndarray, value: np.ndarray, reaction: np.ndarray) -> None:
+        self.subjects = subjects
+        self.experiments = experiments
+        self.subject = subject
+        self.experiment = experiment
+        self.value = value
+        self.reaction = reaction
+
+    def __len__(self) -> int:
+        return len(self.reaction)
+
+
+def to_float(cell) -> float:
+    return float(cell) if isinstance(cell, (int, float)) else math.nan
+
+
+def load_trials(store: SqliteStore, chunk_size: int = CHUNK_SIZE) -> TrialArrays:
+    # chunk_size 행씩 읽어 바로 배열로 변환, Python 객체로는 한 묶음만 유지
+    subject_codes: Dict[str, int] = {}
+    experiment_codes: Dict[str, int] = {}
+    chunks: List[np.ndarray] = []
+
+    sql = 'SELECT name, experiment, value, reaction FROM trials WHERE reaction IS NOT NULL ORDER BY id'
+    for rows in store.query_chunks(sql, size=chunk_size):
+        chunk = np.empty(len(rows), dtype=[('subject', np.int32), ('experiment', np.int32), ('value', np.float64), ('reaction', np.float64)])
+        chunk['subject'] = [subject_codes.setdefault(row[0], len(subject_codes)) for row in rows]
+        chunk['experiment'] = [experiment_codes.setdefault(str(row[1]), len(experiment_codes)) for row in rows]
+        chunk['value'] = [to_float(row[2]) for row in rows]
+        chunk['reaction'] = [to_float(row[3]) for row in rows]
+        chunks.append(chunk)
+
+    trials = np.concatenate(chunks) if len(chunks) > 0 else np.empty(0, dtype=[('subject', np.int32), ('experiment', np.int32), ('value', np.float64), ('reaction', np.float64)])
+    trials = trials[~np.isnan(trials['value']) & ~np.isnan(trials['reaction'])]
+
+    return TrialArrays(
+        list(subject_codes), list(experiment_codes),
+        trials['subject'], trials['experiment'], trials['value'], trials['reaction']
+    )
+
+
+def segment_median(ordered: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # 구간마다 정렬된 값의 앞쪽 lengths개에 대한 중앙값, 빈 구간은 nan
+    last = len(ordered) - 1
+    low = np.minimum(starts + np.maximum(lengths - 1, 0) // 2, last)
+    high = np.minimum(starts + lengths // 2, last)
+    median = (ordered[low] + ordered[high]) / 2
+    median[lengths == 0] = np.nan
+    return median
+
+
+def condition_stats(trials: TrialArrays) -> Dict[str, np.ndarray]:
+    # 조건 (피험자, 실험 종류, 값) 별 통계, 모든 계산은 정렬 + 구간 합으로 처리
+    count = len(trials)
+    if count == 0:
+        return {}
+
+    anticipatory = trials.reaction < ANTICIPATORY_THRESHOLD
+    miss = trials.reaction > MISS_THRESHOLD
+    invalid = anticipatory | miss
+
+    # 조건별로 모으고, 조건 안에서는 유효한 시행을 앞쪽에 반응 시간 순으로 정렬
+    order = np.lexsort((trials.reaction, invalid, trials.value, trials.experiment, trials.subject))
+    subject = trials.subject[order]
+    experiment = trials.experiment[order]
+    value = trials.value[order]
+    reaction = trials.reaction[order]
+    valid = ~invalid[order]
+
+    boundary = np.empty(count, dtype=bool)
+    boundary[0] = True
+    boundary[1:] = (subject[1:] != subject[:-1]) | (experiment[1:] != experiment[:-1]) | (value[1:] != value[:-1])
+    starts = np.flatnonzero(boundary)
+    group = np.cumsum(boundary) - 1
+    counts = np.diff(np.append(starts, count))
+    valid_counts = np.add.reduceat(valid.astype(np.int64), starts)
+
+    # 유효한 시행은 [start, start + valid_count) 구간
+    prefix = np.concatenate(([0.0], np.cumsum(np.where(valid, reaction, 0.0))))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (prefix[starts + valid_counts] - prefix[starts]) / valid_counts
+        median = segment_median(reaction, starts, valid_counts)
+
+        trim = np.floor(valid_counts * TRIM_RATIO).astype(np.int64)
+        trimmed_mean = (prefix[starts + valid_counts - trim] - prefix[starts + trim]) / (valid_counts - 2 * trim)
+
+        # MAD: 중앙값과의 차이를 다시 조건별로 정렬
+        deviation = np.where(valid, np.abs(reaction - median[group]), np.inf)
+        deviation_order = np.lexsort((deviation, group))
+        mad = segment_median(deviation[deviation_order], starts, valid_counts)
+
+        limit = MAD_THRESHOLD * MAD_SCALE * mad[group]
+        outlier = valid & (deviation > limit) & (mad[group] > 0)
+        clean = valid & ~outlier
+        clean_counts = np.add.reduceat(clean.astype(np.int64), starts)
+        clean_sum = np.add.reduceat(np.where(clean, reaction, 0.0), starts)
+        clean_square = np.add.reduceat(np.where(clean, reaction ** 2, 0.0), starts)
+        clean_mean = clean_sum / clean_counts
+        clean_sd = np.sqrt(np.maximum(clean_square / clean_counts - clean_mean ** 2, 0) * clean_counts / (clean_counts - 1))
+
+    return {
+        'subject': np.array(trials.subjects, dtype=object)[subject[starts]],
+        'experiment': np.array(trials.experiments, dtype=object)[experiment[starts]],
+        'value': value[starts],
+        'count': counts,
+        'valid': valid_counts,
+        'anticipatory': np.add.reduceat(anticipatory[order].astype(np.int64), starts),
+        'miss': np.add.reduceat(miss[order].astype(np.int64), starts),
+        'outliers': np.add.reduceat(outlier.astype(np.int64), starts),
+        'mean': mean,
+        'median': median,
+        'trimmed_mean': trimmed_mean,
+        'mad': mad,
+        'clean_mean': clean_mean,
+        'clean_sd': clean_sd,
+    }
+
+
+def fit_pieron(stats: Dict[str, np.ndarray], experiment: str, betas: np.ndarray = PIERON_BETAS) -> Dict[str, np.ndarray]:
+    # 피험자별 RT = r0 + k * value^-beta, beta는 격자 탐색, r0 / k는 가중 최소제곱
+    # 모든 피험자와 beta 후보를 한 번에 계산
+    mask = (stats['experiment'] == experiment) & (stats['value'] > 0)
+    if not np.any(mask):
+        return {}
+
+    subjects, subject_index = np.unique(stats['subject'][mask], return_inverse=True)
+    values, value_index = np.unique(stats['value'][mask], return_inverse=True)
+
+    # (피험자, 값) 행렬, 시행이 없는 조건은 nan
+    y = np.full((len(subjects), len(values)), np.nan)
+    y[subject_index, value_index] = stats['clean_mean'][mask]
+    weight = (~np.isnan(y)).astype(np.float64)
+    y = np.nan_to_num(y)
+
+    x = values[None, :] ** -betas[:, None]                  # (beta, 값)
+    sw = weight.sum(axis=1)[:, None]                        # (피험자, 1)
+    sx = weight @ x.T                                       # (피험자, beta)
+    sxx = weight @ (x ** 2).T
+    sy = (weight * y).sum(axis=1)[:, None]
+    sxy = (weight * y) @ x.T
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        k = (sw * sxy - sx * sy) / (sw * sxx - sx ** 2)
+        r0 = (sy - k * sx) / sw
+        residual = y[:, None, :] - (r0[:, :, None] + k[:, :, None] * x[None, :, :])
+        sse = (weight[:, None, :] * residual ** 2).sum(axis=2)
+        sse[~np.isfinite(sse)] = np.inf
+
+        best = np.argmin(sse, axis=1)
+        rows = np.arange(len(subjects))
+        mean_y = sy[:, 0] / sw[:, 0]
+        sst = (weight * (y - mean_y[:, None]) ** 2).sum(axis=1)
+        r2 = 1 - sse[rows, best] / sst
+
+    # 서로 다른 값이 3개 미만이면 곡선을 정할 수 없음
+    points = sw[:, 0].astype(np.int64)
+    fitted = (points >= 3) & np.isfinite(sse[rows, best])
+
+    return {
+        'subject': subjects,
+        'experiment': np.full(len(subjects), experiment, dtype=object),
+        'points': points,
+        'r0': np.where(fitted, r0[rows, best], np.nan),
+        'k': np.where(fitted, k[rows, best], np.nan),
+        'beta': np.where(fitted, betas[best], np.nan),
+        'r2': np.where(fitted, r2, np.nan),
+    }
+
+
+def analyze(store: SqliteStore, chunk_size: int = CHUNK_SIZE) -> Dict[str, Dict[str, np.ndarray]]:
+    stats = condition_stats(load_trials(store, chunk_size))
+    result = {'conditions': stats}
+    for experiment in CURVE_TYPES:
+        if len(stats) > 0:
+            result[f'pieron_{experiment.lower()}'] = fit_pieron(stats, experiment)
+    return result
+
+
+def write_csv(table: Dict[str, np.ndarray], path: str) -> int:
+    if len(table) == 0:
+        return 0
+
+    columns = list(table.keys())
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        writer.writerows(zip(*[table[column].tolist() for column in columns]))
+    return len(table[columns[0]])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reaction time statistics over all recorded trials')
+    parser.add_argument('--db', default=join('.', 'results', 'results.db'))
+    parser.add_argument('--output', default=join('.', 'results', 'analysis'), help='prefix of the output CSV files')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    for name, table in analyze(SqliteStore(args.db), args.chunk_size).items():
+        path = f'{args.output}-{name}.csv'
+        print(f'{name}: {write_csv(table, path)} rows -> {path}')
@@ -0,0 +1,215 @@
+import csv
+import io
+import json
+import os
+import re
+import zlib
+from os.path import isfile, join
+from typing import Dict, Iterator, List, Tuple, Union
+
+HEADER = ['Name', 'Date Time', 'Experiment', 'Try', 'Time', 'Reaction Interval', 'Value', 'Queue Delay', 'Present Delay']
+
+
+def safe_file_name(name: str) -> str:
+    # 파일 이름에 쓸 수 없는 문자는 '_'로 바꿈
+    return re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', name).strip(' .') or 'subject'
+
+
+def subject_file_name(name: str, extension: str) -> str:
+    # 바꾼 이름이 같아지는 경우를 구분하기 위해 원래 이름의 crc 추가
+    return f'{safe_file_name(name)}-{zlib.crc32(name.encode("utf-8")):08x}{extension}'
+
+
+def parse_cell(text: str) -> Union[int, float, str, None]:
+    if text == '':
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+class TrialJournal:
+    # 시행 하나당 CSV 한 줄을 추가하고 fsync, 기록 비용은 누적 기록 크기와 무관
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.file: Union[io.TextIOWrapper, None] = None
+
+    def exists(self) -> bool:
+        return isfile(self.path)
+
+    def open(self) -> None:
+        if self.file is None:
+            is_new = not self.exists() or os.path.getsize(self.path) == 0
+            self.file = open(self.path, 'a', newline='', encoding='utf-8')
+            if is_new:
+                self.write_line(HEADER)
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def write_line(self, row: List, sync: bool = True) -> None:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(row)
+        self.file.write(buffer.getvalue())
+        if sync:
+            self.sync()
+
+    def sync(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def append(self, row: List, sync: bool = True) -> None:
+        self.open()
+        self.write_line(row, sync)
+
+    def rows(self) -> Iterator[List]:
+        if not self.exists():
+            return
+
+        with open(self.path, newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for line in reader:
+                if len(line) == 0:
+                    continue
+                yield [parse_cell(cell) for cell in line]
+
+    def sheets(self) -> List[Tuple[str, Iterator[List]]]:
+        subjects: Dict[str, List[List]] = {}
+        for row in self.rows():
+            subjects.setdefault(str(row[0]), []).append(row)
+        return [(name, iter(rows)) for name, rows in subjects.items()]
+
+
+class ShardedJournal:
+    # 피험자별 저널 파일 + 작은 인덱스, 각 파일은 해당 피험자를 처음 기록할 때 열림
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.index_path = join(root, 'index.json')
+        self.index: Union[Dict[str, str], None] = None
+        self.shards: Dict[str, TrialJournal] = {}
+
+    def exists(self) -> bool:
+        return isfile(self.index_path)
+
+    def load_index(self) -> Dict[str, str]:
+        if self.index is None:
+            if self.exists():
+                with open(self.index_path, encoding='utf-8') as file:
+                    self.index = json.load(file)
+            else:
+                self.index = {}
+        return self.index
+
+    def save_index(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.index, file, ensure_ascii=False, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.index_path)
+
+    def subjects(self) -> List[str]:
+        return list(self.load_index().keys())
+
+    def shard(self, name: str) -> TrialJournal:
+        if name not in self.shards:
+            index = self.load_index()
+            if name not in index:
+                index[name] = self.new_file_name(name)
+                self.save_index()
+            self.shards[name] = TrialJournal(join(self.root, index[name]))
+        return self.shards[name]
+
+    def new_file_name(self, name: str) -> str:
+        base = safe_file_name(name)
+        used = set(self.index.values())
+        file_name = f'{base}.csv'
+        count = 1
+        while file_name in used or isfile(join(self.root, file_name)):
+            count += 1
+            file_name = f'{base}_{count}.csv'
+        return file_name
+
+    def append(self, row: List, sync: bool = True) -> None:
+        self.shard(str(row[0])).append(row, sync)
+
+    def sync(self) -> None:
+        for shard in self.shards.values():
+            if shard.file is not None:
+                shard.sync()
+
+    def close(self) -> None:
+        for shard in self.shards.values():
+            shard.close()
+        self.shards.clear()
+
+    def rows(self) -> Iterator[List]:
+        for _, rows in self.sheets():
+            yield from rows
+
+    def sheets(self) -> List[Tuple[str, Iterator[List]]]:
+        index = self.load_index()
+        return [(name, TrialJournal(join(self.root, index[name])).rows()) for name in index]
+
+
+def export_xlsx(journal: Union[TrialJournal, ShardedJournal], xlsx_path: str) -> int:
+    from openpyxl import Workbook
+
+    book = Workbook(write_only=True)
+
+    # 기존 방식과 같이 최근에 추가된 피험자가 앞쪽 시트
+    count = 0
+    for name, rows in reversed(journal.sheets()):
+        sheet = book.create_sheet(name)
+        sheet.append(HEADER)
+        for row in rows:
+            sheet.append(row)
+            count += 1
+
+    # 저장 도중 종료되어도 기존 파일이 깨지지 않도록 임시 파일에 저장 후 교체
+    temp_path = xlsx_path + '.tmp'
+    book.save(temp_path)
+    os.replace(temp_path, xlsx_path)
+
+    return count
+
+
+def import_journal(journal, source: Union[TrialJournal, ShardedJournal]) -> int:
+    count = 0
+    for row in source.rows():
+        journal.append(['' if cell is None else cell for cell in row], sync=False)
+        count += 1
+
+    if count > 0:
+        journal.sync()
+
+    return count
+
+
+def import_xlsx(journal: Union[TrialJournal, ShardedJournal], xlsx_path: str) -> int:
+    from openpyxl import load_workbook
+
+    book = load_workbook(xlsx_path, read_only=True)
+    count = 0
+    # 시트는 최근 피험자가 앞쪽이므로 역순으로 옮겨야 순서가 유지됨
+    for sheet in reversed(book.worksheets):
+        for index, row in enumerate(sheet.iter_rows(values_only=True)):
+            if index == 0 or row[0] is None:
+                continue
+            journal.append(['' if cell is None else cell for cell in row], sync=False)
+            count += 1
+    book.close()
+
+    if count > 0:
+        journal.sync()
+
+    return count
@@ -0,0 +1,159 @@
+import os
+import sqlite3
+from os.path import dirname, isfile
+from typing import Iterator, List, Tuple, Union
+
+# HEADER 순서와 같은 열, experiment는 ExperimentType 이름 (이전 기록은 번호) 이므로 타입 지정 없음
+COLUMNS = ['name', 'date_time', 'experiment', 'try', 'time', 'reaction', 'value', 'queue_delay', 'present_delay']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS trials (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    date_time TEXT,
+    experiment,
+    try INTEGER,
+    time INTEGER,
+    reaction REAL,
+    value NUMERIC,
+    queue_delay REAL,
+    present_delay REAL
+);
+CREATE INDEX IF NOT EXISTS trials_name ON trials (name);
+CREATE INDEX IF NOT EXISTS trials_experiment_value ON trials (experiment, value);
+CREATE INDEX IF NOT EXISTS trials_date_time ON trials (date_time);
+'''
+
+INSERT = f"INSERT INTO trials ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+SELECT = f"SELECT {', '.join(COLUMNS)} FROM trials"
+
+
+class SqliteStore:
+    # ShardedJournal과 같은 방식으로 RecordWriter에서 사용
+    # append(sync=False)로 모은 행은 sync()에서 한 트랜잭션으로 기록, 실패하면 discard() 후 다시 시도
+    transactional = True
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection: Union[sqlite3.Connection, None] = None
+        self.staged: List[List] = []
+
+    def exists(self) -> bool:
+        return isfile(self.path)
+
+    def open(self) -> sqlite3.Connection:
+        if self.connection is None:
+            if dirname(self.path) != '':
+                os.makedirs(dirname(self.path), exist_ok=True)
+            # RecordWriter 스레드에서만 기록, 조회는 query()에서 별도 연결 사용
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            # commit마다 WAL을 fsync, 전원이 꺼져도 commit된 시행은 유지 (NORMAL은 마지막 commit들을 잃을 수 있음)
+            self.connection.execute('PRAGMA synchronous=FULL')
+            self.connection.executescript(SCHEMA)
+        return self.connection
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def append(self, row: List, sync: bool = True) -> None:
+        row = [None if cell == '' else cell for cell in row]
+        self.staged.append((row + [None] * len(COLUMNS))[:len(COLUMNS)])
+        if sync:
+            self.sync()
+
+    def sync(self) -> None:
+        if len(self.staged) == 0:
+            return
+
+        connection = self.open()
+        with connection:
+            connection.executemany(INSERT, self.staged)
+        self.staged.clear()
+
+    def discard(self) -> None:
+        self.staged.clear()
+
+    def query(self, sql: str, parameters: Tuple = ()) -> Iterator[List]:
+        # 결과를 한 번에 읽지 않고 한 행씩 반환
+        if not self.exists():
+            return
+
+        connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        try:
+            for row in connection.execute(sql, parameters):
+                yield list(row)
+        finally:
+            connection.close()
+
+    def query_chunks(self, sql: str, parameters: Tuple = (), size: int = 65536) -> Iterator[List[Tuple]]:
+        # 분석용, size개씩 묶어서 반환
+        if not self.exists():
+            return
+
+        connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        try:
+            cursor = connection.execute(sql, parameters)
+            while True:
+                rows = cursor.fetchmany(size)
+                if len(rows) == 0:
+                    break
+                yield rows
+        finally:
+            connection.close()
+
+    def subjects(self) -> List[str]:
+        return [row[0] for row in self.query('SELECT name FROM trials GROUP BY name ORDER BY MIN(id)')]
+
+    def rows(self) -> Iterator[List]:
+        return self.query(f'{SELECT} ORDER BY id')
+
+    def sheets(self) -> List[Tuple[str, Iterator[List]]]:
+        return [(name, self.trials(subject=name)) for name in self.subjects()]
+
+    def trials(
+        self,
+        subject: Union[str, None] = None,
+        exp_type=None,
+        value: Union[int, float, None] = None,
+        since: Union[str, None] = None,
+    ) -> Iterator[List]:
+        # 조건에 맞는 시행 (HEADER 순서), exp_type은 ExperimentType 또는 이름
+        # since: 'YYYY-MM-DD' 또는 'YYYY-MM-DD HH:MM:SS' 이후 기록
+        conditions = []
+        parameters = []
+        if subject is not None:
+            conditions.append('name = ?')
+            parameters.append(subject)
+        if exp_type is not None:
+            conditions.append('experiment = ?')
+            parameters.append(getattr(exp_type, 'name', exp_type))
+        if value is not None:
+            conditions.append('value = ?')
+            parameters.append(value)
+        if since is not None:
+            conditions.append('date_time >= ?')
+            parameters.append(since)
+
+        where = f" WHERE {' AND '.join(conditions)}" if len(conditions) > 0 else ''
+        return self.query(f'{SELECT}{where} ORDER BY id', tuple(parameters))
+
+    def latest(self, subject: str, since: Union[str, None] = None) -> Union[List, None]:
+        # 피험자의 마지막 시행 (HEADER 순서), 없으면 None
+        sql = f'{SELECT} WHERE name = ?'
+        parameters: Tuple = (subject,)
+        if since is not None:
+            sql += ' AND date_time >= ?'
+            parameters += (since,)
+        return next(self.query(f'{sql} ORDER BY id DESC LIMIT 1', parameters), None)
+
+    def trials_after(self, subject: str, after: int = 0) -> Iterator[Tuple[int, List]]:
+        # 기록 번호가 after보다 큰 피험자의 시행 (번호, HEADER 순서)
+        for row in self.query(f"SELECT id, {', '.join(COLUMNS)} FROM trials WHERE name = ? AND id > ? ORDER BY id", (subject, after)):
+            yield row[0], row[1:]
+
+    def last_id(self, subject: str) -> int:
+        row = next(self.query('SELECT MAX(id) FROM trials WHERE name = ?', (subject,)), None)
+        return row[0] if row is not None and row[0] is not None else 0
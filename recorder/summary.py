@@ -0,0 +1,298 @@
+import json
+import math
+import os
+import threading
+from bisect import insort
+from os.path import isfile, join
+from typing import Callable, Dict, Iterable, List, Set, Tuple, Union
+
+from recorder.journal import subject_file_name
+
+# 시행이 기록될 때마다 피험자 / 실험 종류 / 값 별 누적 통계를 갱신 (시행당 O(1))
+# 세션 종료 보고, 대시보드는 전체 기록 대신 피험자별 summary 파일을 읽음
+
+QUANTILES = [0.5, 0.9]
+# 이 개수까지는 표본을 모두 보관해서 정확한 분위수 계산
+EXACT_LIMIT = 64
+
+
+class P2Quantile:
+    # 표본이 EXACT_LIMIT개 이하면 정렬해서 보관하고 정확한 분위수 계산
+    # 그보다 많아지면 P² 알고리즘 (Jain & Chlamtac), 보관하던 표본으로 marker 5개를 잡고 이후 값은 저장하지 않음
+    def __init__(self, p: float) -> None:
+        self.p = p
+        self.samples: Union[List[float], None] = []
+        self.heights: List[float] = []
+        self.positions: List[int] = []
+        self.desired: List[float] = []
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float) -> None:
+        if self.samples is not None:
+            insort(self.samples, x)
+            if len(self.samples) > EXACT_LIMIT:
+                self.start_markers()
+            return
+
+        heights = self.heights
+        if x < heights[0]:
+            heights[0] = x
+            cell = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            cell = 3
+        else:
+            cell = 0
+            while x >= heights[cell + 1]:
+                cell += 1
+
+        positions = self.positions
+        for index in range(cell + 1, 5):
+            positions[index] += 1
+        for index in range(5):
+            self.desired[index] += self.increments[index]
+
+        # 가운데 marker 3개를 원하는 위치 쪽으로 이동
+        for index in range(1, 4):
+            offset = self.desired[index] - positions[index]
+            if (offset >= 1 and positions[index + 1] - positions[index] > 1) or (offset <= -1 and positions[index - 1] - positions[index] < -1):
+                step = 1 if offset > 0 else -1
+                height = self.parabolic(index, step)
+                if not heights[index - 1] < height < heights[index + 1]:
+                    height = heights[index] + step * (heights[index + step] - heights[index]) / (positions[index + step] - positions[index])
+                heights[index] = height
+                positions[index] += step
+
+    def start_markers(self) -> None:
+        # marker i는 정렬된 표본에서 1 + increments[i] * (n - 1) 번째에 가장 가까운 값
+        samples = self.samples
+        count = len(samples)
+        self.desired = [1 + increment * (count - 1) for increment in self.increments]
+        self.positions = []
+        for desired in self.desired:
+            position = int(round(desired))
+            if len(self.positions) > 0:
+                position = max(position, self.positions[-1] + 1)
+            self.positions.append(position)
+        self.heights = [samples[position - 1] for position in self.positions]
+        self.samples = None
+
+    def parabolic(self, index: int, step: int) -> float:
+        q = self.heights
+        n = self.positions
+        return q[index] + step / (n[index + 1] - n[index - 1]) * (
+            (n[index] - n[index - 1] + step) * (q[index + 1] - q[index]) / (n[index + 1] - n[index])
+            + (n[index + 1] - n[index] - step) * (q[index] - q[index - 1]) / (n[index] - n[index - 1])
+        )
+
+    def value(self) -> float:
+        if self.samples is not None:
+            return exact_quantile(self.samples, self.p)
+        return self.heights[2]
+
+    def to_dict(self) -> Dict:
+        if self.samples is not None:
+            return {'p': self.p, 'samples': self.samples}
+        return {'p': self.p, 'heights': self.heights, 'positions': self.positions, 'desired': self.desired}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'P2Quantile':
+        sketch = cls(state['p'])
+        if 'samples' in state:
+            sketch.samples = state['samples']
+        else:
+            sketch.samples = None
+            sketch.heights = state['heights']
+            sketch.positions = state['positions']
+            sketch.desired = state['desired']
+        return sketch
+
+
+def exact_quantile(ordered: List[float], p: float) -> float:
+    # 정렬된 값에서 선형 보간 (statistics.quantiles(method='inclusive')와 같은 방식)
+    if len(ordered) == 0:
+        return math.nan
+    position = p * (len(ordered) - 1)
+    low = int(position)
+    if low + 1 >= len(ordered):
+        return ordered[-1]
+    return ordered[low] + (position - low) * (ordered[low + 1] - ordered[low])
+
+
+class RunningStats:
+    # Welford 평균 / 분산, 최솟값 / 최댓값, 분위수 sketch
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketches = [P2Quantile(p) for p in QUANTILES]
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        for sketch in self.sketches:
+            sketch.add(x)
+
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    def report(self) -> Dict[str, float]:
+        result = {
+            'count': self.count,
+            'mean': self.mean,
+            'sd': math.sqrt(self.variance()) if self.count > 1 else None,
+            'min': self.min,
+            'max': self.max,
+        }
+        for sketch in self.sketches:
+            result[f'p{int(sketch.p * 100)}'] = sketch.value()
+        return result
+
+    def to_dict(self) -> Dict:
+        state = self.report()
+        state['state'] = {'m2': self.m2, 'sketches': [sketch.to_dict() for sketch in self.sketches]}
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'RunningStats':
+        stats = cls()
+        stats.count = state['count']
+        stats.mean = state['mean']
+        stats.min = state['min']
+        stats.max = state['max']
+        stats.m2 = state['state']['m2']
+        stats.sketches = [P2Quantile.from_dict(sketch) for sketch in state['state']['sketches']]
+        return stats
+
+
+class SummaryStore:
+    # 피험자별 파일 root/<이름>-<crc>.json = {'last_id': 마지막으로 반영한 기록 번호, 'experiments': {실험 종류: {값: 통계}}}
+    # 피험자는 처음 기록하거나 조회할 때 읽고, source(피험자, last_id)로 파일 저장 이후의 기록을 반영
+    # (파일이 없거나 저장 전에 비정상 종료된 경우), 저장할 때 last_id(피험자)로 현재 마지막 기록 번호를 기록
+    # RecordWriter 스레드에서 갱신하고 report()는 다른 스레드에서도 호출
+    def __init__(
+        self,
+        root: str,
+        source: Union[Callable[[str, int], Iterable[Tuple[int, List]]], None] = None,
+        last_id: Union[Callable[[str], int], None] = None,
+    ) -> None:
+        self.root = root
+        self.source = source
+        self.last_id = last_id
+        self.subjects: Dict[str, Dict[str, Dict[str, RunningStats]]] = {}
+        self.dirty: Set[str] = set()
+        self.lock = threading.Lock()
+
+    def path(self, subject: str) -> str:
+        return join(self.root, subject_file_name(subject, '.json'))
+
+    def load(self, subject: str) -> Dict[str, Dict[str, RunningStats]]:
+        with self.lock:
+            if subject not in self.subjects:
+                self.subjects[subject] = self.__read(subject)
+            return self.subjects[subject]
+
+    def reset(self) -> None:
+        # 기록이 바깥에서 추가된 경우 (이전 기록 옮기기), 다음에 읽을 때 다시 맞춤
+        with self.lock:
+            self.subjects.clear()
+            self.dirty.clear()
+
+    def __read(self, subject: str) -> Dict[str, Dict[str, RunningStats]]:
+        experiments: Dict[str, Dict[str, RunningStats]] = {}
+        last_id: Union[int, None] = 0
+
+        path = self.path(subject)
+        if isfile(path):
+            try:
+                with open(path, encoding='utf-8') as file:
+                    state = json.load(file)
+                experiments = {
+                    experiment: {value: RunningStats.from_dict(stats) for value, stats in values.items()}
+                    for experiment, values in state['experiments'].items()
+                }
+                last_id = state['last_id']
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f'Summary: {path} is not readable ({e}), rebuilding')
+                experiments = {}
+                last_id = 0
+
+        # 파일 저장 이후 (또는 누적 통계 도입 이전) 기록, last_id 없이 저장된 파일은 그대로 사용
+        if self.source is not None and last_id is not None:
+            for _, row in self.source(subject, last_id):
+                self.__add(experiments, row)
+                self.dirty.add(subject)
+        return experiments
+
+    def update(self, row: List) -> None:
+        # row는 HEADER 순서
+        subject = str(row[0])
+        experiments = self.load(subject)
+        with self.lock:
+            if self.__add(experiments, row):
+                self.dirty.add(subject)
+
+    def __add(self, experiments: Dict[str, Dict[str, RunningStats]], row: List) -> bool:
+        # 반응 시간이 없는 행은 무시
+        reaction = row[5] if len(row) > 5 else None
+        if not isinstance(reaction, (int, float)):
+            return False
+
+        value = row[6] if len(row) > 6 else ''
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        key = str(value)
+
+        values = experiments.setdefault(str(row[2]), {})
+        if key not in values:
+            values[key] = RunningStats()
+        values[key].add(reaction)
+        return True
+
+    def report(self, subject: str) -> Dict:
+        # {실험 종류: {값: {count, mean, sd, min, max, p50, p90}}}
+        experiments = self.load(subject)
+        with self.lock:
+            return {
+                experiment: {value: stats.report() for value, stats in values.items()}
+                for experiment, values in experiments.items()
+            }
+
+    def save(self) -> int:
+        # 바뀐 피험자 파일만 저장, 기록하는 스레드에서 호출해야 last_id가 반영된 기록과 일치
+        with self.lock:
+            states = {
+                subject: {
+                    'experiments': {
+                        experiment: {value: stats.to_dict() for value, stats in values.items()}
+                        for experiment, values in self.subjects[subject].items()
+                    },
+                }
+                for subject in self.dirty
+            }
+            self.dirty.clear()
+
+        saved = 0
+        try:
+            if len(states) > 0:
+                os.makedirs(self.root, exist_ok=True)
+            for subject, state in states.items():
+                state['last_id'] = self.last_id(subject) if self.last_id is not None else None
+                path = self.path(subject)
+                temp_path = path + '.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as file:
+                    json.dump(state, file, ensure_ascii=False)
+                os.replace(temp_path, path)
+                saved += 1
+        except Exception:
+            # 저장하지 못한 피험자는 다음 저장 때 다시 시도
+            with self.lock:
+                self.dirty.update(list(states)[saved:])
+            raise
+        return saved
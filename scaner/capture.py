@@ -0,0 +1,149 @@
+import argparse
+import mmap
+import os
+import socket
+import struct
+import time
+from typing import Iterator, Tuple, Union
+
+# 파일 구조: [magic 8 bytes][패킷 수 uint64] + ([수신 시각 int64 ns][길이 uint16][payload]) * N
+# 수신 시각은 첫 패킷 기준 perf_counter_ns 차이
+MAGIC = b'SLOKCAP1'
+FILE_HEADER = struct.Struct('<8sQ')
+RECORD_HEADER = struct.Struct('<qH')
+GROW_SIZE = 4 * 1024 * 1024
+
+
+class CaptureWriter:
+    def __init__(self, path: str) -> None:
+        self.file = open(path, 'w+b')
+        self.file.truncate(GROW_SIZE)
+        self.map = mmap.mmap(self.file.fileno(), GROW_SIZE)
+        self.cursor = FILE_HEADER.size
+        self.count = 0
+        self.first_time: Union[int, None] = None
+
+    def write(self, received: int, data: bytes) -> None:
+        if self.first_time is None:
+            self.first_time = received
+
+        size = RECORD_HEADER.size + len(data)
+        if self.cursor + size > len(self.map):
+            self.map.resize(len(self.map) + max(GROW_SIZE, size))
+
+        RECORD_HEADER.pack_into(self.map, self.cursor, received - self.first_time, len(data))
+        self.map[self.cursor + RECORD_HEADER.size:self.cursor + size] = data
+        self.cursor += size
+        self.count += 1
+        # 비정상 종료되어도 여기까지는 읽을 수 있도록 매번 갱신
+        FILE_HEADER.pack_into(self.map, 0, MAGIC, self.count)
+
+    def close(self) -> None:
+        FILE_HEADER.pack_into(self.map, 0, MAGIC, self.count)
+        self.map.flush()
+        self.map.close()
+        self.file.truncate(self.cursor)
+        self.file.close()
+
+
+def read_capture(path: str) -> Iterator[Tuple[int, bytes]]:
+    with open(path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, count = FILE_HEADER.unpack_from(data, 0)
+            if magic != MAGIC:
+                raise ValueError(f'{path} is not a capture file')
+
+            cursor = FILE_HEADER.size
+            for _ in range(count):
+                offset, size = RECORD_HEADER.unpack_from(data, cursor)
+                cursor += RECORD_HEADER.size
+                yield offset, data[cursor:cursor + size]
+                cursor += size
+
+
+def capture(path: str, port: int = 2222, duration: float = 0) -> int:
+    client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    # 실험 프로그램과 같은 포트에 bind하려면 실험 프로그램도 exp_setting.SHARE_INPUT_PORT = True로 실행해야 함
+    # 동시에 받을 수 있는 것은 브로드캐스트 패킷뿐, 유니캐스트 패킷은 나중에 bind한 캡처 쪽으로만 가므로 실험 중에는 사용하지 않음
+    client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    client_socket.bind(('', port))
+    client_socket.settimeout(0.5)
+
+    writer = CaptureWriter(path)
+    end_time = time.monotonic() + duration if duration > 0 else None
+    try:
+        while end_time is None or time.monotonic() < end_time:
+            try:
+                data, _ = client_socket.recvfrom(2048)
+            except socket.timeout:
+                continue
+            writer.write(time.perf_counter_ns(), data)
+
+            if writer.count % 100 == 0:
+                print(f'Captured: {writer.count}', end='\r')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+        client_socket.close()
+
+    print(f'Captured {writer.count} packets to {path}')
+    return writer.count
+
+
+def wait_until(target: int):
+    # 1 ms 전까지는 sleep, 이후는 spin
+    remaining = target - time.perf_counter_ns()
+    if remaining > 1000000:
+        time.sleep((remaining - 1000000) / 1000000000)
+    while time.perf_counter_ns() < target:
+        pass
+
+
+def replay(path: str, host: str = '<broadcast>', port: int = 2222, speed: float = 1.0, loop: bool = False) -> int:
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+    sent = 0
+    max_late = 0
+    try:
+        while True:
+            start = time.perf_counter_ns()
+            for offset, data in read_capture(path):
+                target = start + int(offset / speed)
+                wait_until(target)
+                server.sendto(data, (host, port))
+                max_late = max(max_late, time.perf_counter_ns() - target)
+                sent += 1
+
+            if not loop:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+    print(f'Replayed {sent} packets (max late {max_late / 1000000:.3f} ms)')
+    return sent
+
+
+if __name__ == '__main__':
+    # python -m scaner.capture capture scaner.cap --duration 60
+    # python -m scaner.capture replay scaner.cap --speed 2
+    parser = argparse.ArgumentParser(description='SCANeR UDP capture / replay')
+    parser.add_argument('mode', choices=['capture', 'replay'])
+    parser.add_argument('path')
+    parser.add_argument('--port', type=int, default=2222)
+    parser.add_argument('--duration', type=float, default=0, help='capture seconds (0: until Ctrl+C)')
+    parser.add_argument('--host', default='<broadcast>')
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--loop', action='store_true')
+    args = parser.parse_args()
+
+    if args.mode == 'capture':
+        capture(args.path, args.port, args.duration)
+    else:
+        if not os.path.isfile(args.path):
+            parser.error(f'{args.path} not found')
+        replay(args.path, args.host, args.port, args.speed, args.loop)
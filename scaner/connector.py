@@ -1,24 +1,89 @@
+import selectors
 import socket
-import struct
 import threading
-from typing import Callable, List
+from typing import Callable, Dict, List, Tuple, Union
 
 from PyQt5.QtCore import QThread, Qt, pyqtSignal
 import time
 
+from scaner.packet import PacketLayout, load_layout, unpack_all_doubles
 
-class QConnector(QThread):
-    onPress = pyqtSignal(int)
-    onRelease = pyqtSignal(int)
 
-    def __init__(self, parent=None, timeout=60, debug=False) -> None:
+# 한 번에 읽어오는 최대 패킷 수
+MAX_BATCH_SIZE = 256
+RECEIVE_BUFFER_SIZE = 1 << 20
+
+
+class KeyEdgeDetector:
+    # 버튼 상태 변화 감지 (prevKey), 한 번에 받은 패킷 묶음 단위로 처리
+    def __init__(self) -> None:
+        self.prevKey = False
+        self.dropped_count = 0
+
+    def process(self, packets: List) -> List[Tuple[bool, int]]:
+        # 묶음 안에서는 press/release를 각각 처음 한 번만 전달하고 나머지는 버림
+        edges: List[Tuple[bool, int]] = []
+        for packet in packets:
+            hm_key = packet.hm_key
+            sw_key = packet.sw_key
+
+            edge = None
+            if self.prevKey == False and (hm_key == 1 or sw_key == 1):
+                edge = (True, Qt.Key.Key_Mode_switch if hm_key == 1 else Qt.Key.Key_6)
+            elif self.prevKey and (hm_key == 0 or sw_key == 0):
+                edge = (False, Qt.Key.Key_Mode_switch if hm_key == 0 else Qt.Key.Key_6)
+
+            if edge is not None:
+                if any(pressed == edge[0] for pressed, _ in edges):
+                    self.dropped_count += 1
+                else:
+                    edges.append(edge)
+
+            self.prevKey = (hm_key == 1 or sw_key == 1)
+
+        return edges
+
+
+class QConnector(QThread):
+    # (key, 수신 시점의 perf_counter_ns)
+    onPress = pyqtSignal(int, object)
+    onRelease = pyqtSignal(int, object)
+
+    def __init__(
+        self,
+        parent=None,
+        timeout=60,
+        debug=False,
+        layout: Union[PacketLayout, None] = None,
+        port: int = 2222,
+        receive_buffer: int = RECEIVE_BUFFER_SIZE,
+        share_port: bool = False,
+    ) -> None:
         super().__init__(parent=parent)
         self.debug = debug
+        self.timeout = timeout
+        self.layout = layout if layout is not None else load_layout('scaner')
 
         self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)  # UDP
+        if share_port:
+            # 패킷 캡처 (scaner/capture.py)를 함께 실행할 때만, Linux는 양쪽 모두 SO_REUSEADDR를 설정해야 bind 가능
+            # 브로드캐스트 패킷은 두 소켓 모두 받지만 유니캐스트 패킷은 한 소켓 (Linux는 나중에 bind한 쪽)만 받음
+            self.client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        elif hasattr(socket, 'SO_EXCLUSIVEADDRUSE'):
+            # Windows: 다른 프로세스가 SO_REUSEADDR로 포트를 가로채지 못하도록 (기본은 다른 프로그램이 같은 포트를 쓰면 bind 실패)
+            self.client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
         self.client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        self.client_socket.bind(('', 2222))
-        self.client_socket.settimeout(timeout)
+        if receive_buffer > 0:
+            self.client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        self.client_socket.bind(('', port))
+        self.client_socket.setblocking(False)
+        self.receive_buffer = self.client_socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+
+        self.edge_detector = KeyEdgeDetector()
+        self.packet_count = 0
+        self.batch_count = 0
+        self.coalesced_count = 0
+        self.max_backlog = 0
 
         self.activated = False
 
@@ -30,30 +95,70 @@ class QConnector(QThread):
         self.activated = False
         self.wait()
 
+    def stats(self) -> Dict[str, int]:
+        return {
+            'packets': self.packet_count,
+            'batches': self.batch_count,
+            'coalesced': self.coalesced_count,
+            'dropped_edges': self.edge_detector.dropped_count,
+            'max_backlog': self.max_backlog,
+            'receive_buffer': self.receive_buffer,
+        }
+
+    def receive_batch(self) -> List[Tuple[bytes, Tuple]]:
+        # 소켓에 쌓인 패킷을 모두 읽음
+        batch = []
+        while len(batch) < MAX_BATCH_SIZE:
+            try:
+                batch.append(self.client_socket.recvfrom(2048))
+            except BlockingIOError:
+                break
+        return batch
+
     def run(self) -> None:
-        prevKey = False
+        # 패킷이 올 때까지 대기 후 쌓인 패킷을 한 번에 읽어 handle_batch로 전달 (DemuxConnector도 같은 루프 사용)
+        selector = selectors.DefaultSelector()
+        selector.register(self.client_socket, selectors.EVENT_READ)
+        last_received = time.monotonic()
 
-        try:
-            while self.activated:
-                data, addr = self.client_socket.recvfrom(1024)
-                hm_key = struct.unpack('d', data[40:48])[0]
-                sw_key = struct.unpack('d', data[88:96])[0]
+        while self.activated:
+            # deactivate()가 바로 반영되도록 짧게 대기
+            if len(selector.select(0.5)) == 0:
+                if time.monotonic() - last_received > self.timeout:
+                    self.activated = False
+                    print('Check SCANeR state and restart this app.')
+                continue
 
-                if self.debug:
-                    data_1 = [struct.unpack('d', data[cursor - 8:cursor])[0] for cursor in range(8, len(data), 8)]
-                    print(f'{addr} ({time.time_ns()}): {data_1} [{hm_key}, {sw_key}]', end='\r')
+            received = time.perf_counter_ns()
+            last_received = time.monotonic()
 
-                if prevKey == False and (hm_key == 1 or sw_key == 1):
-                    self.onPress.emit(Qt.Key.Key_Mode_switch if hm_key == 1 else Qt.Key.Key_6)
-                elif prevKey and (hm_key == 0 or sw_key == 0):
-                    self.onRelease.emit(Qt.Key.Key_Mode_switch if hm_key == 0 else Qt.Key.Key_6)
+            batch = self.receive_batch()
+            if len(batch) == 0:
+                continue
 
-                prevKey = (hm_key == 1 or sw_key == 1)
-        except socket.timeout as e:
-            self.activated = False
-            print('Check SCANeR state and restart this app.')
-        
-        print('UDP Connector Deactivated')
+            self.batch_count += 1
+            self.packet_count += len(batch)
+            self.coalesced_count += len(batch) - 1
+            self.max_backlog = max(self.max_backlog, len(batch))
+
+            self.handle_batch(batch, received)
+
+        selector.close()
+        print('UDP Connector Deactivated', self.stats())
+
+    def handle_batch(self, batch: List[Tuple[bytes, Tuple]], received: int) -> None:
+        layout = self.layout
+        packets = [layout.decode(data) for data, _ in batch if len(data) >= layout.size]
+
+        if self.debug:
+            data, addr = batch[-1]
+            print(f'{addr} ({time.time_ns()}) x{len(batch)}: {list(unpack_all_doubles(data))} {packets[-1] if packets else None}', end='\r')
+
+        for pressed, key in self.edge_detector.process(packets):
+            if pressed:
+                self.onPress.emit(key, received)
+            else:
+                self.onRelease.emit(key, received)
 
 
 # 일반 Thread 버전, QTimer 관련 문제가 있어 실험에서는 쓰이지 않음
@@ -65,6 +170,7 @@ class Connector:
             socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         self.client_socket.bind(('', 2222))
         self.client_socket.settimeout(3)
+        self.layout = load_layout('legacy')
 
         self.onPress: List[Callable] = []
         self.onRelease: List[Callable] = []
@@ -88,7 +194,9 @@ class Connector:
         try:
             while self.activated:
                 data, addr = self.client_socket.recvfrom(1024)
-                key = struct.unpack('d', data[8:16])[0]
+                if len(data) < self.layout.size:
+                    continue
+                key = self.layout.decode(data).key
                 # print(f"{addr}: {prevKey} <-> {key} == {prevKey == 0 and key == 1}")
                 if prevKey == 0 and key == 1:
                     for callback in self.onPress:
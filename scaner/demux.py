@@ -0,0 +1,130 @@
+from typing import Dict, List, Tuple, Union
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from scaner.connector import RECEIVE_BUFFER_SIZE, KeyEdgeDetector, QConnector
+from scaner.packet import PacketLayout, load_layout
+
+
+class SimulatorStream(QObject):
+    # 시뮬레이터 하나의 입력, MainWindowEvents에는 QConnector 대신 전달 (onPress, activate, deactivate)
+    onPress = pyqtSignal(int, object)
+    onRelease = pyqtSignal(int, object)
+
+    def __init__(self, receiver: 'DemuxConnector', name: str) -> None:
+        super().__init__()
+        self.receiver = receiver
+        self.name = name
+
+        # 시뮬레이터마다 별도로 버튼 상태 추적
+        self.edge_detector = KeyEdgeDetector()
+        self.packet_count = 0
+        self.active = False
+
+    def activate(self) -> None:
+        if not self.active:
+            self.active = True
+            self.receiver.attach()
+
+    def deactivate(self) -> None:
+        if self.active:
+            self.active = False
+            self.receiver.detach()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'packets': self.packet_count,
+            'dropped_edges': self.edge_detector.dropped_count,
+        }
+
+
+class DemuxConnector(QConnector):
+    # 포트 하나로 여러 SCANeR의 패킷을 받아 시뮬레이터별 stream으로 분배
+    # 소켓 설정과 수신 루프는 QConnector와 같고 받은 묶음 처리(handle_batch)만 다름
+    # route='address': 보낸 주소 ('ip' 또는 'ip:port')로 구분
+    # route=<필드 이름>: 패킷 layout의 해당 필드 값 (시뮬레이터 ID)으로 구분
+    def __init__(
+        self,
+        sources: Dict[str, Union[str, int, float]],
+        route: str = 'address',
+        timeout=60,
+        layout: Union[PacketLayout, None] = None,
+        port: int = 2222,
+        receive_buffer: int = RECEIVE_BUFFER_SIZE,
+        share_port: bool = False,
+    ) -> None:
+        layout = layout if layout is not None else load_layout('scaner')
+        if route != 'address' and route not in layout.record._fields:
+            raise ValueError(f"Layout '{layout.name}' has no field '{route}' to route by")
+        super().__init__(timeout=timeout, layout=layout, port=port, receive_buffer=receive_buffer, share_port=share_port)
+        self.route = route
+
+        self.streams: Dict[str, SimulatorStream] = {}
+        # 주소 또는 ID -> stream
+        self.routes: Dict[Union[str, float], SimulatorStream] = {}
+        for name, source in sources.items():
+            stream = SimulatorStream(self, name)
+            self.streams[name] = stream
+            self.routes[str(source) if route == 'address' else float(source)] = stream
+        # recvfrom 주소 (ip, port) -> stream, 처음 받은 주소만 문자열로 찾음
+        self.address_cache: Dict[Tuple[str, int], Union[SimulatorStream, None]] = {}
+
+        self.unrouted_count = 0
+        self.attached = 0
+
+    def stream(self, name: str) -> SimulatorStream:
+        return self.streams[name]
+
+    def attach(self) -> None:
+        # 첫 stream이 활성화될 때 수신 시작
+        self.attached += 1
+        if not self.activated:
+            self.activate()
+
+    def detach(self) -> None:
+        # 모든 stream이 비활성화되면 수신 종료
+        self.attached -= 1
+        if self.attached <= 0:
+            self.deactivate()
+
+    def stats(self) -> Dict:
+        return {
+            'packets': self.packet_count,
+            'batches': self.batch_count,
+            'unrouted': self.unrouted_count,
+            'max_backlog': self.max_backlog,
+            'receive_buffer': self.receive_buffer,
+            'streams': {name: stream.stats() for name, stream in self.streams.items()},
+        }
+
+    def find_stream(self, addr: Tuple[str, int], packet) -> Union[SimulatorStream, None]:
+        if self.route != 'address':
+            return self.routes.get(getattr(packet, self.route))
+
+        if addr not in self.address_cache:
+            host, port = addr[0], addr[1]
+            self.address_cache[addr] = self.routes.get(f'{host}:{port}', self.routes.get(host))
+        return self.address_cache[addr]
+
+    def handle_batch(self, batch: List[Tuple[bytes, Tuple]], received: int) -> None:
+        layout = self.layout
+
+        # 받은 순서를 유지하면서 stream별로 나눔
+        grouped: Dict[SimulatorStream, List] = {}
+        for data, addr in batch:
+            if len(data) < layout.size:
+                continue
+            packet = layout.decode(data)
+            stream = self.find_stream(addr, packet)
+            if stream is None:
+                self.unrouted_count += 1
+                continue
+            grouped.setdefault(stream, []).append(packet)
+
+        for stream, packets in grouped.items():
+            stream.packet_count += len(packets)
+            for pressed, key in stream.edge_detector.process(packets):
+                if pressed:
+                    stream.onPress.emit(key, received)
+                else:
+                    stream.onRelease.emit(key, received)
@@ -0,0 +1,70 @@
+import struct
+from collections import namedtuple
+from os.path import dirname, join
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+LAYOUT_PATH = join(dirname(__file__), 'packet.yaml')
+
+
+class PacketLayout:
+    # 필드 정의(이름 -> offset, 형식)를 하나의 struct.Struct로 미리 컴파일
+    # 패킷 하나를 unpack_from 한 번으로 이름 있는 record로 변환
+    def __init__(self, name: str, fields: Dict[str, Tuple[int, str]], byte_order: str = '<') -> None:
+        self.name = name
+
+        format_text = byte_order
+        cursor = 0
+        names: List[str] = []
+        for field_name, (offset, field_type) in sorted(fields.items(), key=lambda item: item[1][0]):
+            if offset < cursor:
+                raise ValueError(f"Field '{field_name}' overlaps previous field in layout '{name}'")
+            if offset > cursor:
+                format_text += f'{offset - cursor}x'
+            format_text += field_type
+            cursor = offset + struct.calcsize(byte_order + field_type)
+            names.append(field_name)
+
+        self.struct = struct.Struct(format_text)
+        self.size = self.struct.size
+        self.record = namedtuple(f'{name.capitalize()}Packet', names)
+        self.fields = fields
+
+    def decode(self, data: bytes) -> NamedTuple:
+        return self.record._make(self.struct.unpack_from(data))
+
+    def encode(self, size: Union[int, None] = None, **values) -> bytes:
+        # 테스트용 패킷 생성, 정의되지 않은 영역은 0
+        packed = self.struct.pack(*[values.get(field_name, 0) for field_name in self.record._fields])
+        if size is not None and size > len(packed):
+            packed += bytes(size - len(packed))
+        return packed
+
+
+layouts: Dict[str, PacketLayout] = {}
+
+
+def load_layout(name: str = 'scaner', path: str = LAYOUT_PATH) -> PacketLayout:
+    key = f'{path}:{name}'
+    if key not in layouts:
+        from config_cache import load_cached
+
+        config = load_cached(path)
+
+        fields = {
+            field_name: (field['offset'], field['type'])
+            for field_name, field in config['layouts'][name]['fields'].items()
+        }
+        layouts[key] = PacketLayout(name, fields, config.get('byte_order', '<'))
+
+    return layouts[key]
+
+
+debug_structs: Dict[int, struct.Struct] = {}
+
+
+def unpack_all_doubles(data: bytes) -> Tuple[float, ...]:
+    # 디버그 출력용, 패킷 전체를 double 배열로 해석
+    count = len(data) // 8
+    if count not in debug_structs:
+        debug_structs[count] = struct.Struct(f'<{count}d')
+    return debug_structs[count].unpack_from(data)
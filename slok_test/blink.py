@@ -0,0 +1,149 @@
+import time
+from typing import List, Union
+
+from PyQt5.QtGui import QGuiApplication
+from PyQt5.QtWidgets import QWidget
+
+from slok_test.scheduler import PreciseTimer
+
+DEFAULT_REFRESH_RATE = 60.0
+
+
+class BlinkTransition:
+    def __init__(self, shown: bool, frame: int, scheduled: int, fired: int) -> None:
+        self.shown = shown
+        self.frame = frame
+        # perf_counter_ns 기준
+        self.scheduled = scheduled
+        self.fired = fired
+        self.presented: Union[int, None] = None
+
+    def to_dict(self):
+        return {
+            'shown': self.shown,
+            'frame': self.frame,
+            'scheduled': self.scheduled,
+            'fired': self.fired,
+            'presented': self.presented,
+        }
+
+
+class FrameBlinkEngine:
+    # 깜빡임 on/off 구간을 화면 주사율 기준 프레임 수로 정함
+    # 기존 QTimer 방식과 같이 1000 / frequency ms마다 on <-> off 전환 (한 번 켜지고 꺼지는 주기는 frequency / 2 Hz)
+    # k번째 전환 = round(k * refresh / frequency) 프레임, 프레임 수가 정수가 아니면 구간 길이를 번갈아 조정해서 평균 주기를 맞춤
+    # raster: 시작 시각 기준 절대 시각으로 예약
+    # OpenGL (count_swaps): frameSwapped 횟수로 전환하되 같은 시각 격자보다 앞서지 않음
+    def __init__(self, widget: QWidget) -> None:
+        self.widget = widget
+        self.timer = PreciseTimer('blink', log=getattr(widget.parent_window, 'deadline_log', None))
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+
+        self.frequency = 0.0
+        self.refresh_rate = DEFAULT_REFRESH_RATE
+        self.origin = 0
+        self.index = 0
+        self.transitions: List[BlinkTransition] = []
+
+        # OpenGL 위젯에서 설정, 깜빡이는 동안 매 프레임 다시 그려서 swap 횟수를 셈
+        self.count_swaps = False
+        self.active = False
+        self.frame = 0
+
+    def measure_refresh_rate(self) -> float:
+        screen = self.widget.screen() if self.widget.isVisible() else None
+        if screen is None:
+            screen = QGuiApplication.primaryScreen()
+
+        rate = screen.refreshRate() if screen is not None else 0
+        return rate if rate > 0 else DEFAULT_REFRESH_RATE
+
+    def transition_frame(self, index: int) -> int:
+        return round(index * self.refresh_rate / self.frequency)
+
+    def frame_deadline(self, frame: int) -> int:
+        return self.origin + int(frame * 1000000000 / self.refresh_rate)
+
+    def start(self, frequency: float) -> None:
+        self.stop()
+        self.frequency = frequency
+        self.refresh_rate = self.measure_refresh_rate()
+
+        self.origin = time.perf_counter_ns()
+        self.index = 0
+        self.frame = 0
+        self.transitions = [BlinkTransition(True, 0, self.origin, self.origin)]
+        self.active = True
+        if self.count_swaps:
+            self.widget.update()
+        else:
+            self.schedule_next()
+
+    def stop(self) -> None:
+        self.active = False
+        self.timer.stop()
+
+    def schedule_next(self) -> None:
+        self.index += 1
+        # 이벤트 루프가 오래 막혔던 경우 밀린 전환은 on/off 짝을 맞춰서 건너뜀
+        now = time.perf_counter_ns()
+        while self.frame_deadline(self.transition_frame(self.index + 1)) < now:
+            self.index += 2
+
+        self.timer.startAt(self.frame_deadline(self.transition_frame(self.index)))
+
+    def tick(self) -> None:
+        if self.count_swaps:
+            self.widget.update()
+            return
+
+        fired = time.perf_counter_ns()
+        frame = self.transition_frame(self.index)
+        scheduled = self.frame_deadline(frame)
+
+        self.widget.blink()
+        self.transitions.append(BlinkTransition(self.widget.blink_show, frame, scheduled, fired))
+
+        self.schedule_next()
+
+    def presented(self, timestamp: int) -> None:
+        # 전환 이후 처음 그려진 시점
+        if len(self.transitions) > 0 and self.transitions[-1].presented is None:
+            self.transitions[-1].presented = timestamp
+
+    def swapped(self, timestamp: int) -> None:
+        # OpenGL: frameSwapped마다 호출, 여기서 바꾼 상태는 다음 swap에 표시되므로 한 프레임 먼저 전환
+        self.presented(timestamp)
+        if not (self.count_swaps and self.active):
+            return
+
+        self.frame += 1
+        frame = self.transition_frame(self.index + 1)
+        if self.frame + 1 < frame:
+            self.widget.update()
+            return
+
+        # vsync가 없으면 (소프트웨어 OpenGL 등) swap이 주사율보다 자주 일어나므로 시각도 확인
+        # 아직 이르면 다시 그리지 않고 전환 한 프레임 전 시각까지 대기 (tick에서 다시 그림)
+        deadline = self.frame_deadline(frame - 1)
+        if timestamp < deadline:
+            self.timer.startAt(deadline)
+            return
+
+        self.index += 1
+        self.widget.blink()
+        self.transitions.append(BlinkTransition(self.widget.blink_show, frame, self.frame_deadline(frame), timestamp))
+
+    def summary(self) -> dict:
+        errors = [
+            transition.presented - transition.scheduled
+            for transition in self.transitions[1:] if transition.presented is not None
+        ]
+        return {
+            'frequency': self.frequency,
+            'refresh_rate': self.refresh_rate,
+            'transitions': len(self.transitions),
+            'mean_error_ms': sum(errors) / len(errors) / 1000000 if errors else 0,
+            'max_error_ms': max(errors) / 1000000 if errors else 0,
+        }
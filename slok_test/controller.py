@@ -1,12 +1,25 @@
 from random import randrange
-from typing import Union
+from typing import Dict, List, Tuple, Union
 
-from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QPixmap
 
 from slok_test.exp_setting import *
+from slok_test.stimulus import pixmap_cache
 from slok_test.window import MainWindow
 
 
+def stimulus_parameters(exp_type: ExperimentType, value: Union[int, float]) -> Tuple[int, int, float]:
+    # (size, brightness, frequency)
+    if exp_type == ExperimentType.LUMINANCE:
+        return 160, value, 0
+    elif exp_type == ExperimentType.SIZE:
+        return value, 63, 0
+    elif exp_type == ExperimentType.BLINK:
+        return 128, 63, value
+    else:
+        return 128, 63, 0
+
+
 class UIController:
     def __init__(self, target: MainWindow) -> None:
         self.target = target
@@ -46,6 +59,7 @@ class UIController:
             widget.setEnabled(False)
         self.target.guide_label.setVisible(False)
         self.target.image.setVisible(False)
+        self.target.image.blink_engine.stop()
     
     def start_timer(self, msec_time: int, random: int = 0):
         if random != 0:
@@ -65,23 +79,55 @@ class UIController:
 
         self.target.image.setBlink(frequency)
         
+        self.target.image.requestPresentation()
         self.target.image.update()
 
+    def blink_log(self) -> Dict:
+        # 마지막으로 표시한 깜빡임 자극의 전환 기록
+        engine = self.target.image.blink_engine
+        log = engine.summary()
+        log['transition_log'] = [transition.to_dict() for transition in engine.transitions]
+        return log
+
     def show_image_by_type(self, exp_type: ExperimentType, value: Union[int, float]):
-        if exp_type == ExperimentType.LUMINANCE:
-            self.show_image(brightness=value, size=160)
-        elif exp_type == ExperimentType.SIZE:
-            self.show_image(brightness=63, size=value)
-        elif exp_type == ExperimentType.BLINK:
-            self.show_image(brightness=63, frequency=value)
-        else:
-            self.show_image()
+        size, brightness, frequency = stimulus_parameters(exp_type, value)
+        self.show_image(size=size, brightness=brightness, frequency=frequency)
+
+    def prewarm(self, exp_types: List[ExperimentType], test_sets: List[List]):
+        # 첫 시행에서만 생기는 지연(pixmap 생성, 크기 변경, 글꼴 캐시 등)을 실험 시작 전에 미리 처리
+        image = self.target.image
+        radius = image.radius
+        brightness = image.color.alpha()
+        buffer = QPixmap(self.target.size())
+
+        for exp_type, values in zip(exp_types, test_sets):
+            for value in values:
+                size, alpha, _ = stimulus_parameters(exp_type, value)
+                pixmap_cache.get(size, alpha)
+                image.setSize(size)
+                image.setBrightness(alpha)
+                image.render(buffer)
+
+        guide_text = self.target.guide_label.text()
+        for text in ['Exp. Ended', '0123456789']:
+            self.target.guide_label.setText(text)
+            self.target.guide_label.render(buffer)
+        self.target.guide_label.setText(guide_text)
+
+        image.setSize(radius)
+        image.setBrightness(brightness)
+        image.resetPosition()
+        image.paint_times.clear()
 
     def dispose(self):
         self.target.events.onKeyPress.clear()
         self.target.events.onTimeout.clear()
+        self.target.events.onPresented.clear()
         
-        self.target.move(0, 0)
+        self.target.move(
+            self.target.main_monitor.left(),
+            self.target.main_monitor.top()
+        )
         self.target.resize(
             self.target.main_monitor.width(),
             self.target.main_monitor.height()
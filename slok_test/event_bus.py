@@ -0,0 +1,91 @@
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Tuple, Union
+
+from PyQt5.QtCore import Qt, QTimer
+
+# 숫자가 작을수록 먼저 실행
+PRIORITY_CRITICAL = 0
+PRIORITY_NORMAL = 100
+
+
+class FakeKeyEvent:
+    def __init__(self, key=Qt.Key.Key_End, timestamp: Union[int, None] = None) -> None:
+        self.value = key
+        # time.perf_counter_ns() 기준
+        self.timestamp = time.perf_counter_ns() if timestamp is None else timestamp
+        
+    def key(self):
+        return self.value
+
+
+class Subscriber:
+    def __init__(self, callback: Callable, key: Union[Qt.Key, None], priority: int, deferred: bool) -> None:
+        self.callback = callback
+        self.key = key
+        self.priority = priority
+        self.deferred = deferred
+
+
+class KeyEventBus:
+    # 키 입력 전달
+    # - 키별 전달 목록을 미리 만들어 두고 우선순위 순서로 실행 (반응 시간 기록이 가장 먼저)
+    # - 이벤트 객체는 미리 만든 것을 돌려 씀
+    # - deferred 구독자(로그 출력 등)는 입력 처리가 끝난 뒤 이벤트 루프에서 실행
+    def __init__(self, defer: Union[Callable[[Callable[[], None]], None], None] = None, pool_size: int = 16) -> None:
+        self.subscribers: List[Subscriber] = []
+        self.routes: Dict[Qt.Key, Tuple[Tuple[Callable, ...], Tuple[Callable, ...]]] = {}
+
+        self.pool = [FakeKeyEvent(timestamp=0) for _ in range(pool_size)]
+        self.pool_index = 0
+
+        self.defer = defer if defer is not None else lambda callback: QTimer.singleShot(0, callback)
+        self.deferred_queue: Deque[Tuple[Callable, FakeKeyEvent]] = deque()
+
+    def subscribe(self, callback: Callable, key: Union[Qt.Key, None] = None, priority: int = PRIORITY_NORMAL, deferred: bool = False) -> None:
+        self.subscribers.append(Subscriber(callback, key, priority, deferred))
+        # 같은 우선순위는 등록 순서 유지
+        self.subscribers.sort(key=lambda subscriber: subscriber.priority)
+        self.routes.clear()
+
+    def unsubscribe(self, callback: Callable) -> None:
+        self.subscribers = [subscriber for subscriber in self.subscribers if subscriber.callback != callback]
+        self.routes.clear()
+
+    def clear(self) -> None:
+        self.subscribers.clear()
+        self.routes.clear()
+        self.deferred_queue.clear()
+
+    def route(self, key: Qt.Key) -> Tuple[Tuple[Callable, ...], Tuple[Callable, ...]]:
+        route = self.routes.get(key)
+        if route is None:
+            targets = [subscriber for subscriber in self.subscribers if subscriber.key is None or subscriber.key == key]
+            route = (
+                tuple(subscriber.callback for subscriber in targets if not subscriber.deferred),
+                tuple(subscriber.callback for subscriber in targets if subscriber.deferred),
+            )
+            self.routes[key] = route
+        return route
+
+    def publish(self, key: Qt.Key, timestamp: int) -> None:
+        event = self.pool[self.pool_index]
+        self.pool_index = (self.pool_index + 1) % len(self.pool)
+        event.value = key
+        event.timestamp = timestamp
+
+        immediate, deferred = self.route(key)
+        for callback in immediate:
+            callback(event)
+
+        if len(deferred) > 0:
+            need_schedule = len(self.deferred_queue) == 0
+            for callback in deferred:
+                self.deferred_queue.append((callback, event))
+            if need_schedule:
+                self.defer(self.run_deferred)
+
+    def run_deferred(self) -> None:
+        while len(self.deferred_queue) > 0:
+            callback, event = self.deferred_queue.popleft()
+            callback(event)
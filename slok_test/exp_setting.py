@@ -32,7 +32,33 @@ LUMINANCE_TEST_SET = [15, 95, 175, 255]     # 0.7 lux, 1.1 lux, 2.1 lux, 3.8 lux
                                             # NHTSA 기준
                                             # 최소 0.68도 tan = 0.012, 최적 1.43도 tan = 0.025, 시뮬레이터 눈과 모니터 사이 거리 63cm
 SIZE_TEST_SET = [27, 57, 120, 252]          # 0.8cm (최소), 1.6cm (최적, x2.1), 3.3cm (x2.1), 6.9cm (x2.1)
-BLINK_TEST_SET = [1, 2, 3, 4]
+BLINK_TEST_SET = [1, 2, 3, 4]                # 1000 / 값 ms마다 on <-> off 전환 (깜빡임 한 주기는 값 / 2 Hz)
+
+TEST_SETS = {
+    ExperimentType.LUMINANCE: LUMINANCE_TEST_SET,
+    ExperimentType.SIZE: SIZE_TEST_SET,
+    ExperimentType.BLINK: BLINK_TEST_SET,
+}
+
+# 같은 이름으로 다시 시작하면 끝나지 않은 세션을 마지막 기록 다음 시행부터 이어서 진행
+# False이면 항상 새 순서로 시작 (이전 순서 파일은 보관)
+RESUME_SESSIONS = True
 
 STAND_BY_TIME = 1000 * 7
 STAND_BY_TIME_RANDOM_ADJUSTMENT = 1000 * 3
+
+# True: 자극이 실제로 화면에 그려진 시점부터 반응 시간 측정
+# False: show_image 호출 시점부터 측정 (이전 방식)
+PRESENTATION_TIMING = True
+
+# True: 상태 전환 / 동작 실행 시간을 기록하고 실험 종료 시 logs/trace-*.json으로 저장
+PHASE_TRACING = True
+
+# 'raster': QWidget + QPainter, 'opengl': QOpenGLWidget (vsync, frameSwapped 기준 표시 시각)
+RENDER_BACKEND = 'raster'
+# GPU가 없는 PC에서 opengl 사용 시 Mesa 소프트웨어 렌더링
+SOFTWARE_OPENGL = False
+
+# SCANeR 입력 포트를 패킷 캡처 (python -m scaner.capture)와 같이 사용, 캡처할 때만 True
+# False이면 같은 포트를 쓰는 다른 프로그램이 있을 때 시작 시 bind 오류
+SHARE_INPUT_PORT = False
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+from PyQt5.QtCore import QCoreApplication, Qt
+from PyQt5.QtGui import QPainter, QSurfaceFormat
+from PyQt5.QtWidgets import QOpenGLWidget, QWidget
+
+from slok_test.stimulus import CircleMixin, pixmap_cache
+
+
+def configure_opengl(software: bool = False):
+    # QApplication 생성 전에 호출해야 함
+    # vsync(swap interval 1) + double buffering
+    surface_format = QSurfaceFormat.defaultFormat()
+    surface_format.setSwapBehavior(QSurfaceFormat.SwapBehavior.DoubleBuffer)
+    surface_format.setSwapInterval(1)
+    QSurfaceFormat.setDefaultFormat(surface_format)
+
+    if software:
+        # GPU가 없는 환경: Windows는 Qt의 opengl32sw(Mesa llvmpipe), Linux는 Mesa llvmpipe
+        QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_UseSoftwareOpenGL)
+        if sys.platform.startswith('linux'):
+            os.environ.setdefault('LIBGL_ALWAYS_SOFTWARE', '1')
+
+
+class GLFlexibleCircle(CircleMixin, QOpenGLWidget):
+    # FlexibleCircle과 같은 API, 실제 swap 완료 시점(frameSwapped)을 표시 시각으로 사용
+    def __init__(self, parent: QWidget, radius: int = 127) -> None:
+        super().__init__(parent)
+        self.swap_pending = False
+        self.frameSwapped.connect(self.onFrameSwapped)
+        self.initializeCircle(parent, radius)
+        # 깜빡임 전환을 화면 주사율 추정 대신 실제 swap 횟수로 맞춤
+        self.blink_engine.count_swaps = True
+
+    def paintGL(self) -> None:
+        start = time.perf_counter_ns()
+
+        # 원 바깥 영역은 창 배경과 같은 검은색
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.black)
+        if self.blink_show:
+            painter.drawPixmap(0, 0, pixmap_cache.get(self.radius, self.color.alpha()))
+        painter.end()
+        self.paint_times.append(time.perf_counter_ns() - start)
+
+        if self.presentation_requested and self.blink_show:
+            self.presentation_requested = False
+            self.swap_pending = True
+
+    def onFrameSwapped(self) -> None:
+        self.blink_engine.swapped(time.perf_counter_ns())
+
+        if self.swap_pending:
+            self.swap_pending = False
+            self.parent_window.events.presentedEvent(time.perf_counter_ns())
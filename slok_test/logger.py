@@ -0,0 +1,132 @@
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Union
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+
+LOG_DIR = './logs'
+
+
+class RingLogger:
+    # GUI 스레드에서는 미리 만들어 둔 슬롯에 (시각, 레벨, 형식, 인자)만 기록
+    # 문자열 변환, 파일/콘솔 출력은 백그라운드 스레드에서 처리
+    # 버퍼가 가득 차면 가장 오래된 기록을 덮어쓰고 dropped로 집계
+    def __init__(self, log_dir: str = LOG_DIR, capacity: int = 4096, level: int = INFO, flush_interval: float = 0.1, echo: bool = True) -> None:
+        self.log_dir = log_dir
+        self.capacity = capacity
+        self.level = level
+        self.flush_interval = flush_interval
+        self.echo = echo
+
+        self.slots: List[list] = [[0, 0, '', ()] for _ in range(capacity)]
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+        # perf_counter_ns -> 실제 시각 변환 기준
+        self.base_wall = time.time()
+        self.base_counter = time.perf_counter_ns()
+
+        self.file = None
+        self.wakeup = threading.Event()
+        self.worker: Union[threading.Thread, None] = None
+        self.flush_lock = threading.Lock()
+
+    def setLevel(self, level: int) -> None:
+        self.level = level
+
+    def log(self, level: int, message: str, *args) -> None:
+        if level < self.level:
+            return
+
+        with self.lock:
+            if self.head - self.tail >= self.capacity:
+                self.tail += 1
+                self.dropped += 1
+
+            slot = self.slots[self.head % self.capacity]
+            slot[0] = time.perf_counter_ns()
+            slot[1] = level
+            slot[2] = message
+            slot[3] = args
+            self.head += 1
+
+        if self.worker is None:
+            self.start()
+
+    def debug(self, message: str, *args) -> None:
+        self.log(DEBUG, message, *args)
+
+    def info(self, message: str, *args) -> None:
+        self.log(INFO, message, *args)
+
+    def warning(self, message: str, *args) -> None:
+        self.log(WARNING, message, *args)
+
+    def error(self, message: str, *args) -> None:
+        self.log(ERROR, message, *args)
+
+    def start(self) -> None:
+        self.worker = threading.Thread(target=self.__run, name='RingLogger', daemon=True)
+        self.worker.start()
+
+    def flush(self) -> None:
+        # 백그라운드 스레드와 종료 시 호출이 겹쳐도 순서가 유지되도록
+        with self.flush_lock:
+            self.__flush()
+
+    def __flush(self) -> None:
+        entries = []
+        with self.lock:
+            while self.tail < self.head:
+                entries.append(tuple(self.slots[self.tail % self.capacity]))
+                self.tail += 1
+            dropped = self.dropped
+            self.dropped = 0
+
+        if len(entries) == 0 and dropped == 0:
+            return
+
+        lines = []
+        if dropped > 0:
+            lines.append(f'{self.format_time(entries[0][0] if entries else time.perf_counter_ns())} WARNING Logger: {dropped} records dropped')
+        for timestamp, level, message, args in entries:
+            try:
+                text = message % args if len(args) > 0 else message
+            except (TypeError, ValueError):
+                text = f'{message} {args}'
+            lines.append(f'{self.format_time(timestamp)} {LEVEL_NAMES.get(level, level)} {text}')
+
+        output = '\n'.join(lines) + '\n'
+        if self.file is None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            path = os.path.join(self.log_dir, f"session-{datetime.now().strftime('%Y%m%d-%H%M%S')}.log")
+            self.file = open(path, 'a', encoding='utf-8')
+        self.file.write(output)
+        self.file.flush()
+
+        if self.echo:
+            sys.stdout.write(output)
+            sys.stdout.flush()
+
+    def format_time(self, timestamp: int) -> str:
+        wall = self.base_wall + (timestamp - self.base_counter) / 1000000000
+        return datetime.fromtimestamp(wall).strftime('%H:%M:%S.%f')[:-3]
+
+    def __run(self) -> None:
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+
+logger = RingLogger()
@@ -1,16 +1,22 @@
+import json
+import os
 import time
-from collections import deque
+from datetime import datetime
 from enum import Enum
-from random import shuffle
-from typing import Callable, Dict, Union
+from typing import Callable, Dict, List, Union
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QKeyEvent
+import test_recorder
 from test_recorder import ExperimentInfo, record
 
 from slok_test.controller import UIController
+from slok_test.event_bus import PRIORITY_CRITICAL
 from slok_test.exp_setting import *
+from slok_test.logger import logger
+from slok_test.schedule import SCHEDULE_DIR, SessionSchedule, prepare_schedule, resume_index
 from slok_test.survey_window import SurveyWindow
+from slok_test.tracing import PhaseTracer
 from slok_test.window import FakeKeyEvent, MainWindow
 
 
@@ -27,82 +33,113 @@ class ExperimentPhase(Enum):
 
 def initialize_experiment(sender: MainWindow, text: str = 'None', mode: str = 'Standard'):
     if mode == 'Standard':
-        print('Test Mode')
+        logger.info('Test Mode')
         Experiment(sender, text)
     else:
-        print('Survey Mode')
+        logger.info('Survey Mode')
         Survey(sender)
 
 
 class Experiment:
-    def __init__(self, window: MainWindow, name: str) -> None:
+    # controller, clock, recorder, schedule은 시뮬레이션 등에서 교체 가능 (slok_test.simulation)
+    # 시행 순서는 schedule (protocol.yaml로 미리 생성), start_trial부터 이어서 진행 가능
+    # schedule을 지정하지 않으면 저장된 순서와 이 이름의 기록으로 중단된 위치부터 이어서 진행
+    def __init__(
+        self,
+        window: MainWindow,
+        name: str,
+        controller: Union[UIController, None] = None,
+        clock: Callable[[], int] = time.perf_counter_ns,
+        recorder: Callable[[ExperimentInfo], None] = record,
+        schedule: Union[SessionSchedule, None] = None,
+        start_trial: Union[int, None] = None,
+    ) -> None:
         self.info = ExperimentInfo(name)
-        self.controller = UIController(window)
+        self.controller = controller if controller is not None else UIController(window)
+        self.clock = clock
+        self.recorder = recorder
+        self.tracer = PhaseTracer(clock, PHASE_TRACING)
+        # 이 창(스테이션)의 타이머 기록, 시뮬레이션 창에는 없음
+        self.deadline_log = getattr(window, 'deadline_log', None)
+        self.__state = ExperimentPhase.UNKNOWN
         self.state = ExperimentPhase.EXPERIMENT_STARTED
-        self.test_order = deque(TEST_LIST)
-        self.test_count = len(self.test_order)
-        self.test_set = deque()
+        if schedule is None:
+            # 끝나지 않은 세션만 이어서 진행, 끝난 세션이면 같은 이름으로 새 세션 시작
+            completed = None
+            if RESUME_SESSIONS:
+                completed = lambda saved: resume_index(saved, test_recorder.last_trial(name, saved.created))
+            schedule, resumed = prepare_schedule(name, os.path.join(test_recorder.RESULT_DIR, SCHEDULE_DIR), completed=completed)
+            if start_trial is None:
+                start_trial = resumed
+                if start_trial > 0:
+                    logger.info('Resuming %s at trial %d / %d', name, start_trial, len(schedule))
+        self.schedule = schedule
+        start_trial = start_trial or 0
+        self.trial_index = start_trial
+        # 현재 블록의 시행 범위 [block_start, block_end)
+        self.block_start = start_trial
+        self.block_end = start_trial
         self.current_test_type = ExperimentType.NONE
 
         self.timeout_actions: Dict[ExperimentPhase, Callable[[], None]] = {}
         self.anykey_actions: Dict[ExperimentPhase, Callable[[], None]] = {}
         self.binded_key_actions: Dict[Qt.Key, Callable[[Qt.Key], None]] = {}
 
+        # self.clock() 기준
         self.start_time = 0
+        self.cue_time = 0
+        self.waiting_presentation = False
+        self.input_time = 0
+        self.input_delay = 0
 
         self.test_value: Union[int, None] = None
+        self.blink_logs: List[Dict] = []
 
         # -----
         window.events.onTimeout.append(self.onTimeout)
-        window.events.onKeyPress.append(self.receive_input)
+        window.events.onKeyPress.subscribe(self.receive_input, priority=PRIORITY_CRITICAL)
+        window.events.onPresented.append(self.cue_presented)
         # -----
 
         window.events.onTimeout.append(self.print_event)
-        window.events.onKeyPress.append(self.print_event)
+        window.events.onKeyPress.subscribe(self.print_event, deferred=True)
 
         self.define_actions()
 
         self.start_exp()
 
+    @property
+    def state(self) -> ExperimentPhase:
+        return self.__state
+
+    @state.setter
+    def state(self, state: ExperimentPhase):
+        self.tracer.transition(self.__state, state)
+        self.__state = state
+
     def print_event(self, _=None):
-        print(self.current_test_type, f'[{self.test_value}]', ':', self.state)
+        logger.info('%s [%s] : %s', self.current_test_type, self.test_value, self.state)
 
     def onTimeout(self):
         if self.state in self.timeout_actions:
-            self.timeout_actions[self.state]()
+            self.tracer.dispatch('timeout', self.state, self.timeout_actions[self.state])
 
     def receive_input(self, e: Union[QKeyEvent, FakeKeyEvent]):
+        received = self.clock()
+        # SCANeR 입력은 패킷을 받은 시점, 키보드 / 마우스 입력은 핸들러 실행 시점 (MainWindowEvents.keyPressEvent)
+        self.input_time = getattr(e, 'timestamp', received)
+        self.input_delay = received - self.input_time
+
         input_key: Qt.Key = e.key()
 
         if input_key in self.binded_key_actions:
             self.binded_key_actions[input_key](input_key)
         else:
             if self.state in self.anykey_actions:
-                self.anykey_actions[self.state]()
-
-    def generate_exp_var(self, exp_type: ExperimentType):
-        var_list = []
-
-        if exp_type == ExperimentType.LUMINANCE:
-            var_list = LUMINANCE_TEST_SET * \
-                (MAX_TEST_COUNT // len(LUMINANCE_TEST_SET) + 1)
-        elif exp_type == ExperimentType.SIZE:
-            var_list = SIZE_TEST_SET * \
-                (MAX_TEST_COUNT // len(SIZE_TEST_SET) + 1)
-        elif exp_type == ExperimentType.BLINK:
-            var_list = BLINK_TEST_SET * \
-                (MAX_TEST_COUNT // len(BLINK_TEST_SET) + 1)
-        else:
-            raise Exception('Not supported type')
-
-        var_list = var_list[:MAX_TEST_COUNT]
-        shuffle(var_list)
-        print(var_list, '<-')
-
-        return deque(var_list)
+                self.tracer.dispatch('anykey', self.state, self.anykey_actions[self.state], self.input_time)
 
     def define_actions(self):
-        # 실험 순서는 self.test_order에 정의
+        # 실험 순서는 self.schedule에 정의 (protocol.yaml)
         # 1. 각 테스트 시작 준비
         self.timeout_actions[ExperimentPhase.EXPERIMENT_STARTED] = self.reset_test_set
         self.timeout_actions[ExperimentPhase.TEST_SET_ENDED] = self.reset_test_set
@@ -113,7 +150,7 @@ class Experiment:
         # 4. 실험대상자가 버튼을 누르면 시간 측정
         self.anykey_actions[ExperimentPhase.SHOWING_IMAGE] = self.subject_reacted
         # 5. 3~4 과정 반복
-        # 6. MAX_TEST_COUNT에 다다르면 1~5과정 반복
+        # 6. 블록의 시행이 끝나면 다음 블록으로 1~5과정 반복
         self.timeout_actions[ExperimentPhase.SUBJECT_REACTED] = self.stand_by_before_show_cue
         # 7. 모든 실험이 끝나면 실험 종료
         self.anykey_actions[ExperimentPhase.EXPERIMENT_ENDED] = self.finalize_experiment
@@ -122,24 +159,37 @@ class Experiment:
         self.binded_key_actions[Qt.Key.Key_Backspace] = self.soft_reset_test_set
 
     def start_exp(self):
+        if self.deadline_log is not None:
+            self.deadline_log.clear()
+
         self.controller.hide_all()
         self.controller.move_window_to_target()
+        self.prewarm()
 
         self.print_event()
 
         self.controller.start_timer(100)
 
+    def prewarm(self):
+        self.controller.prewarm(
+            self.schedule.blocks,
+            [self.schedule.values[exp_type] for exp_type in self.schedule.blocks]
+        )
+
+        # 입력 처리 경로도 한 번 실행 (EXPERIMENT_STARTED 상태에서는 아무 동작 없음)
+        self.receive_input(FakeKeyEvent(timestamp=self.clock()))
+
     def reset_test_set(self):
         self.controller.hide_all()
         self.controller.setGuideText(True, '')
 
-        self.info.try_count = 0
-
-        if len(self.test_order) > 0:
-            self.current_test_type = self.test_order.popleft()
-            self.test_set = self.generate_exp_var(self.current_test_type)
-            # self.info.exp_count = self.test_count - len(self.test_order)
+        if self.trial_index < len(self.schedule):
+            self.current_test_type = self.schedule.exp_type(self.trial_index)
+            self.block_start, self.block_end = self.schedule.block_range(self.trial_index)
+            # 블록 중간에서 이어서 시작하는 경우 시행 번호도 이어짐
+            self.info.try_count = self.schedule.try_count(self.trial_index)
             self.info.exp_count = self.current_test_type.name
+            logger.info('%s <-', [self.schedule.value(index) for index in range(self.trial_index, self.block_end)])
             self.state = ExperimentPhase.TEST_SET_READY
         else:
             self.state = ExperimentPhase.EXPERIMENT_ENDED
@@ -149,43 +199,67 @@ class Experiment:
         self.controller.hide_all()
         self.controller.setGuideText(True, '')
 
+        # 현재 블록을 처음부터 다시 진행
+        self.trial_index = self.block_start
         self.info.try_count = 0
         self.state = ExperimentPhase.TEST_SET_READY
 
     def stand_by_before_show_cue(self):
         self.controller.hide_all()
 
-        if self.info.try_count < MAX_TEST_COUNT:
+        if self.trial_index < self.block_end:
             self.state = ExperimentPhase.STAND_BY
-            self.controller.start_timer(
-                STAND_BY_TIME, STAND_BY_TIME_RANDOM_ADJUSTMENT)
+            self.controller.start_timer(self.schedule.stand_by(self.trial_index))
         else:
             self.state = ExperimentPhase.TEST_SET_ENDED
             self.controller.start_timer(1000)
 
     def show_cue(self):
-        self.test_value = self.test_set.pop()
+        self.test_value = self.schedule.value(self.trial_index)
 
         self.controller.show_image_by_type(
             self.current_test_type, self.test_value)
 
-        self.start_time = time.time_ns()
+        # 화면 표시 시점이 확인될 때까지는 요청 시점을 기준으로 사용
+        self.cue_time = self.clock()
+        self.start_time = self.cue_time
+        self.info.present_delay = 0
+        self.waiting_presentation = PRESENTATION_TIMING
         self.state = ExperimentPhase.SHOWING_IMAGE
 
+    def cue_presented(self, timestamp: int):
+        if self.waiting_presentation and self.state == ExperimentPhase.SHOWING_IMAGE:
+            self.waiting_presentation = False
+            self.start_time = timestamp
+            self.info.present_delay = timestamp - self.cue_time
+
     def subject_reacted(self):
         # Recording...
-        end_time = time.time_ns()
-        interval_time = end_time - self.start_time
-        self.info.record_time = end_time
+        interval_time = self.input_time - self.start_time
+        self.info.record_time = time.time_ns()
         self.info.last_reaction_time = interval_time
+        self.info.queue_delay = self.input_delay
         self.info.value = self.test_value
-        print(f"Exp {self.info.exp_count} [{self.info.value}] Try {self.info.try_count}: {self.info.last_reaction_time / 1000000000} sec")
-        record(self.info)
+        if self.waiting_presentation:
+            self.waiting_presentation = False
+            logger.warning('Cue presentation was not reported, measured from show request')
+        logger.info(
+            'Exp %s [%s] Try %d: %s sec (queue %s ms, present %s ms)',
+            self.info.exp_count, self.info.value, self.info.try_count,
+            self.info.last_reaction_time / 1000000000, self.info.queue_delay / 1000000, self.info.present_delay / 1000000
+        )
+        self.recorder(self.info)
+
+        if self.current_test_type == ExperimentType.BLINK:
+            blink_log = self.controller.blink_log()
+            blink_log.update({'try': self.info.try_count, 'value': self.test_value})
+            self.blink_logs.append(blink_log)
 
         self.controller.hide_all()
         self.controller.setGuideText(True, '')
 
         self.info.try_count += 1
+        self.trial_index += 1
         self.state = ExperimentPhase.SUBJECT_REACTED
         self.test_value = None
 
@@ -195,13 +269,46 @@ class Experiment:
         self.controller.hide_all()
         self.controller.setInputFormVisible(True)
         self.controller.dispose()
+
+        test_recorder.export()
+        test_recorder.flush()
+        logger.info('Recorder: %s', test_recorder.stats())
+        for exp_type, values in test_recorder.summary(self.info.name).items():
+            for value, stats in values.items():
+                logger.info(
+                    'Summary %s [%s]: n=%d, mean %.3f sec, p50 %.3f sec, p90 %.3f sec',
+                    exp_type, value, stats['count'], stats['mean'], stats['p50'], stats['p90']
+                )
+        if self.deadline_log is not None:
+            self.deadline_log.print_report()
+        self.save_blink_logs()
+        if self.tracer.enabled:
+            self.tracer.save(self.info.name)
+        logger.flush()
+
         del self.controller
         del self
 
+    def save_blink_logs(self):
+        if len(self.blink_logs) == 0:
+            return
+
+        log_dir = os.path.join(test_recorder.RESULT_DIR, 'blink')
+        os.makedirs(log_dir, exist_ok=True)
+        path = os.path.join(log_dir, f"{self.info.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.blink_logs, file, ensure_ascii=False, indent=2)
+        logger.info('Blink log saved: %s', path)
+
 
 class Survey:
     def __init__(self, window: MainWindow) -> None:
         self.controller = UIController(window)
+        self.controller.prewarm(
+            SURVEY_LIST,
+            [TEST_SETS[exp_type] for exp_type in SURVEY_LIST]
+        )
+
         self.subwindow = SurveyWindow(
             self.controller,
             (
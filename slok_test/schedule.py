@@ -0,0 +1,255 @@
+import json
+import os
+import random
+from array import array
+from datetime import datetime
+from os.path import isdir, isfile, join
+from typing import Callable, Dict, List, Tuple, Union
+
+from config_cache import load_cached
+from recorder.journal import subject_file_name
+from slok_test.exp_setting import *
+
+PROTOCOL_PATH = 'protocol.yaml'
+SCHEDULE_DIR = 'schedules'
+# 피험자 번호 할당 기록, 번호마다 파일 하나
+SUBJECT_INDEX_DIR = 'subjects'
+SCHEDULE_VERSION = 1
+
+
+class Protocol:
+    # protocol.yaml, 없는 항목은 exp_setting 값 사용
+    def __init__(self, config: Dict) -> None:
+        self.blocks = [ExperimentType[name] for name in config.get('blocks', [exp_type.name for exp_type in TEST_LIST])]
+        self.counterbalance = config.get('counterbalance', False)
+        self.trials_per_block = config.get('trials_per_block', MAX_TEST_COUNT)
+        self.max_run = config.get('max_run', self.trials_per_block)
+        stand_by = config.get('stand_by', {})
+        self.stand_by_time = stand_by.get('time', STAND_BY_TIME)
+        self.stand_by_jitter = stand_by.get('jitter', STAND_BY_TIME_RANDOM_ADJUSTMENT)
+        self.values = {exp_type: list(config.get('values', {}).get(exp_type.name, TEST_SETS[exp_type])) for exp_type in self.blocks}
+
+
+def load_protocol(path: str = PROTOCOL_PATH) -> Protocol:
+    return Protocol(load_cached(path) if isfile(path) else {})
+
+
+def balanced_latin_square(size: int) -> List[List[int]]:
+    # Williams design, 각 조건이 모든 위치와 모든 조건 바로 뒤에 같은 횟수로 나옴
+    # 조건 수가 홀수이면 역순 행을 추가해서 2 * size 행
+    first = [0]
+    low, high = 1, size - 1
+    while len(first) < size:
+        first.append(low)
+        low += 1
+        if len(first) < size:
+            first.append(high)
+            high -= 1
+
+    rows = [[(condition + shift) % size for condition in first] for shift in range(size)]
+    if size % 2 == 1:
+        rows += [list(reversed(row)) for row in rows]
+    return rows
+
+
+def constrained_order(count: int, choices: int, max_run: int, rng: random.Random, attempts: int = 100) -> List[int]:
+    # 0 ~ choices-1을 고르게 반복한 count개를 섞되 같은 값은 최대 max_run번까지만 연속
+    pool = (list(range(choices)) * (count // choices + 1))[:count]
+
+    for _ in range(attempts):
+        remaining = {choice: pool.count(choice) for choice in range(choices)}
+        order: List[int] = []
+        run = 0
+        while len(order) < count:
+            candidates = [
+                choice for choice, left in remaining.items()
+                if left > 0 and not (run >= max_run and len(order) > 0 and order[-1] == choice)
+            ]
+            if len(candidates) == 0:
+                break
+
+            # 남은 개수가 많은 값을 먼저 소진해야 끝에서 막히지 않음
+            choice = rng.choices(candidates, [remaining[candidate] for candidate in candidates])[0]
+            run = run + 1 if len(order) > 0 and order[-1] == choice else 1
+            remaining[choice] -= 1
+            order.append(choice)
+
+        if len(order) == count:
+            return order
+
+    raise ValueError(f'Cannot order {count} trials of {choices} values with at most {max_run} repeats')
+
+
+class SessionSchedule:
+    # 시행마다 (블록 번호, 블록 안에서의 시행 번호, 값 번호, 대기 시간 ms)를 array('i') 하나에 연속 저장
+    # 실험 중에는 index로 읽기만 함
+    STRIDE = 4
+
+    def __init__(
+        self,
+        blocks: List[ExperimentType],
+        values: Dict[ExperimentType, List],
+        trials: array,
+        subject_index: int = 0,
+        created: Union[str, None] = None,
+    ) -> None:
+        self.blocks = blocks
+        self.values = values
+        self.trials = trials
+        self.subject_index = subject_index
+        # 'YYYY-MM-DD HH:MM:SS', 이어서 진행할 때 이 시각 이후의 기록만 사용
+        self.created = created
+        # 블록 번호 -> 값 목록
+        self.block_values = [values[exp_type] for exp_type in blocks]
+
+    def __len__(self) -> int:
+        return len(self.trials) // self.STRIDE
+
+    def exp_type(self, index: int) -> ExperimentType:
+        return self.blocks[self.trials[index * self.STRIDE]]
+
+    def try_count(self, index: int) -> int:
+        return self.trials[index * self.STRIDE + 1]
+
+    def value(self, index: int) -> Union[int, float]:
+        base = index * self.STRIDE
+        return self.block_values[self.trials[base]][self.trials[base + 2]]
+
+    def stand_by(self, index: int) -> int:
+        return self.trials[index * self.STRIDE + 3]
+
+    def block_range(self, index: int) -> Tuple[int, int]:
+        # index가 속한 블록의 [시작, 끝)
+        start = index - self.try_count(index)
+        end = index + 1
+        while end < len(self) and self.try_count(end) != 0:
+            end += 1
+        return start, end
+
+    def find(self, exp_type_name: str, try_count: int) -> Union[int, None]:
+        # 실험 종류 이름과 블록 안에서의 시행 번호로 index 찾기
+        names = [exp_type.name for exp_type in self.blocks]
+        if exp_type_name not in names:
+            return None
+        block = names.index(exp_type_name)
+        for index in range(len(self)):
+            if self.trials[index * self.STRIDE] == block and self.try_count(index) == try_count:
+                return index
+        return None
+
+    def save(self, path: str) -> None:
+        header = {
+            'version': SCHEDULE_VERSION,
+            'subject_index': self.subject_index,
+            'created': self.created,
+            'blocks': [exp_type.name for exp_type in self.blocks],
+            'values': {exp_type.name: values for exp_type, values in self.values.items()},
+            'itemsize': self.trials.itemsize,
+        }
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(json.dumps(header).encode('utf-8') + b'\n')
+            self.trials.tofile(file)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SessionSchedule':
+        with open(path, 'rb') as file:
+            header = json.loads(file.readline())
+            trials = array('i')
+            if header['version'] != SCHEDULE_VERSION or header['itemsize'] != trials.itemsize:
+                raise ValueError(f'Unsupported schedule file: {path}')
+            trials.frombytes(file.read())
+
+        blocks = [ExperimentType[name] for name in header['blocks']]
+        values = {ExperimentType[name]: values for name, values in header['values'].items()}
+        return cls(blocks, values, trials, header['subject_index'], header.get('created'))
+
+
+def compile_session(protocol: Protocol, subject_index: int, seed: Union[int, str, None] = None) -> SessionSchedule:
+    rng = random.Random(seed if seed is not None else subject_index)
+
+    block_order = list(range(len(protocol.blocks)))
+    if protocol.counterbalance and len(block_order) > 1:
+        square = balanced_latin_square(len(block_order))
+        block_order = square[subject_index % len(square)]
+
+    blocks = [protocol.blocks[index] for index in block_order]
+    trials = array('i')
+    for block, exp_type in enumerate(blocks):
+        choices = len(protocol.values[exp_type])
+        order = constrained_order(protocol.trials_per_block, choices, protocol.max_run, rng)
+        jitter = protocol.stand_by_jitter
+        for try_count, value_index in enumerate(order):
+            delay = protocol.stand_by_time + (rng.randrange(-jitter, jitter) if jitter > 0 else 0)
+            trials.extend((block, try_count, value_index, delay))
+
+    return SessionSchedule(blocks, {exp_type: protocol.values[exp_type] for exp_type in blocks}, trials, subject_index)
+
+
+def schedule_path(schedule_dir: str, name: str) -> str:
+    return join(schedule_dir, subject_file_name(name, '.schedule'))
+
+
+def allocate_subject_index(schedule_dir: str, name: str) -> int:
+    # 번호 파일을 O_EXCL로 만들어서 여러 스테이션 프로세스가 동시에 시작해도 번호가 겹치지 않음
+    # 순서 파일을 지워도 이미 할당된 번호는 다시 쓰지 않음
+    index_dir = join(schedule_dir, SUBJECT_INDEX_DIR)
+    if isdir(index_dir):
+        index = len(os.listdir(index_dir))
+    else:
+        # 번호 파일 도입 이전에 만든 순서 파일 수부터 시작
+        index = len([file_name for file_name in os.listdir(schedule_dir) if file_name.endswith('.schedule')])
+        os.makedirs(index_dir, exist_ok=True)
+
+    while True:
+        try:
+            fd = os.open(join(index_dir, str(index)), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            index += 1
+            continue
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(name)
+        return index
+
+
+def archive_schedule(path: str, schedule: SessionSchedule) -> str:
+    # 끝난 (또는 이어서 하지 않을) 순서 파일은 생성 시각을 붙인 이름으로 보관
+    stamp = (schedule.created or datetime.now().strftime('%Y-%m-%d %H:%M:%S')).replace('-', '').replace(':', '').replace(' ', '-')
+    archive_path = f'{path}.{stamp}'
+    os.replace(path, archive_path)
+    return archive_path
+
+
+def prepare_schedule(
+    name: str,
+    schedule_dir: str,
+    protocol_path: str = PROTOCOL_PATH,
+    completed: Union[Callable[[SessionSchedule], int], None] = None,
+) -> Tuple[SessionSchedule, int]:
+    # (순서, 시작 index)
+    # 저장된 순서가 있고 completed(순서)가 끝까지 가지 않았으면 이어서 진행
+    # 이미 끝났거나 completed가 없으면 (이어서 하지 않음) 저장된 순서는 보관하고 새 피험자 번호로 다시 생성
+    path = schedule_path(schedule_dir, name)
+    if isfile(path):
+        schedule = SessionSchedule.load(path)
+        start = completed(schedule) if completed is not None else len(schedule)
+        if start < len(schedule):
+            return schedule, start
+        archive_schedule(path, schedule)
+
+    os.makedirs(schedule_dir, exist_ok=True)
+    subject_index = allocate_subject_index(schedule_dir, name)
+    # 같은 이름의 두 번째 세션은 다른 순서가 되도록 피험자 번호도 seed에 포함
+    schedule = compile_session(load_protocol(protocol_path), subject_index, seed=f'{name}:{subject_index}')
+    schedule.created = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    schedule.save(path)
+    return schedule, 0
+
+
+def resume_index(schedule: SessionSchedule, last_trial: Union[List, None]) -> int:
+    # 마지막으로 기록된 시행 (HEADER 순서) 다음 index, 기록이 없으면 0
+    if last_trial is None:
+        return 0
+    index = schedule.find(str(last_trial[2]), last_trial[3])
+    return index + 1 if index is not None else 0
@@ -0,0 +1,134 @@
+import time
+from typing import Dict, List, Tuple, Union
+
+from PyQt5.QtCore import QObject, Qt, QTimer, pyqtSignal
+
+from slok_test.logger import logger
+
+# QTimer는 이 시간만큼 일찍 깨우고 나머지는 perf_counter_ns로 대기
+SPIN_TAIL_NS = 2000000
+
+
+class DeadlineLog:
+    # 각 deadline의 요청 시각과 실제 실행 시각 (perf_counter_ns)
+    # 창(스테이션)마다 하나, --shared 실행에서 스테이션끼리 섞이지 않도록 보고에 name 표시
+    def __init__(self, name: str = '') -> None:
+        self.name = name
+        self.records: Dict[str, List[Tuple[int, int]]] = {}
+
+    def add(self, name: str, requested: int, actual: int) -> None:
+        self.records.setdefault(name, []).append((requested, actual))
+
+    def clear(self) -> None:
+        self.records.clear()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for name, records in self.records.items():
+            lateness = sorted(actual - requested for requested, actual in records)
+            count = len(lateness)
+            result[name] = {
+                'count': count,
+                'mean_ms': sum(lateness) / count / 1000000,
+                'p50_ms': lateness[count // 2] / 1000000,
+                'p99_ms': lateness[min(count - 1, count * 99 // 100)] / 1000000,
+                'max_ms': lateness[-1] / 1000000,
+            }
+        return result
+
+    def print_report(self) -> None:
+        for name, stats in self.report().items():
+            logger.info(
+                "[%s] Timer '%s': %d deadlines, late mean %.3f ms, p50 %.3f ms, p99 %.3f ms, max %.3f ms",
+                self.name, name, stats['count'], stats['mean_ms'], stats['p50_ms'], stats['p99_ms'], stats['max_ms']
+            )
+
+
+class PreciseTimer(QObject):
+    # QTimer와 같은 방식으로 사용 (start/stop/setInterval/timeout)
+    # 반복 시 다음 deadline은 이전 deadline 기준이므로 오차가 누적되지 않음
+    # log가 있으면 실행된 deadline마다 기록
+    timeout = pyqtSignal()
+
+    def __init__(
+        self,
+        name: str,
+        parent: Union[QObject, None] = None,
+        spin_tail: int = SPIN_TAIL_NS,
+        log: Union[DeadlineLog, None] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.name = name
+        self.spin_tail = spin_tail
+        self.log = log
+
+        self.interval = 0
+        self.deadline = 0
+        self.active = False
+        self.single_shot = False
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.__wake)
+
+    def setInterval(self, msec: int) -> None:
+        self.interval = msec
+
+    def setSingleShot(self, single_shot: bool) -> None:
+        self.single_shot = single_shot
+
+    def isActive(self) -> bool:
+        return self.active
+
+    def start(self, msec: Union[int, None] = None) -> None:
+        if msec is not None:
+            self.interval = msec
+
+        self.active = True
+        self.__arm(time.perf_counter_ns() + self.interval * 1000000)
+
+    def startAt(self, deadline: int) -> None:
+        # perf_counter_ns 기준 절대 시각에 실행
+        self.active = True
+        self.__arm(deadline)
+
+    def stop(self) -> None:
+        self.active = False
+        self.timer.stop()
+
+    def __arm(self, deadline: int) -> None:
+        self.deadline = deadline
+        remaining = deadline - self.spin_tail - time.perf_counter_ns()
+        self.timer.start(max(0, remaining // 1000000))
+
+    def __wake(self) -> None:
+        if not self.active:
+            return
+
+        now = time.perf_counter_ns()
+        if self.deadline - now > self.spin_tail:
+            # 너무 일찍 깨어난 경우 다시 대기
+            self.__arm(self.deadline)
+            return
+
+        while now < self.deadline:
+            now = time.perf_counter_ns()
+
+        if self.log is not None:
+            self.log.add(self.name, self.deadline, now)
+
+        if self.single_shot:
+            self.active = False
+            self.timeout.emit()
+            return
+
+        # 콜백 안에서 stop()을 부를 수 있으므로 다음 deadline을 먼저 설정
+        interval = max(1, self.interval) * 1000000
+        next_deadline = self.deadline + interval
+        if next_deadline <= now:
+            # 이벤트 루프가 오래 막혔던 경우 밀린 주기를 몰아서 실행하지 않음
+            next_deadline += ((now - next_deadline) // interval + 1) * interval
+        self.__arm(next_deadline)
+
+        self.timeout.emit()
@@ -0,0 +1,273 @@
+import argparse
+import random
+import time
+from contextlib import nullcontext, redirect_stdout
+from typing import Callable, Dict, List, Tuple, Union
+
+from PyQt5.QtCore import Qt
+from test_recorder import ExperimentInfo
+
+from slok_test.event_bus import KeyEventBus
+from slok_test.exp_setting import *
+from slok_test.logger import WARNING, logger
+from slok_test.manager import Experiment, ExperimentPhase
+from slok_test.schedule import Protocol, SessionSchedule, compile_session, load_protocol
+
+# 실제 창과 QTimer 없이 가상 시계로 실험 진행을 시뮬레이션
+# python -m slok_test.simulation --sessions 1000
+
+
+class VirtualClock:
+    def __init__(self) -> None:
+        self.now = 0
+
+    def __call__(self) -> int:
+        return self.now
+
+
+class SimulatedEvents:
+    # MainWindowEvents와 같은 콜백 목록
+    def __init__(self) -> None:
+        self.onSubmit: List[Callable] = []
+        self.onTimeout: List[Callable] = []
+        # deferred 구독자는 입력 처리 직후 바로 실행
+        self.onKeyPress = KeyEventBus(defer=lambda callback: callback())
+        self.onPresented: List[Callable[[int], None]] = []
+
+    def timeoutEvent(self):
+        for callback in self.onTimeout:
+            if callback() == True:
+                return
+
+    def keyPressEvent(self, key: Qt.Key, timestamp: int):
+        self.onKeyPress.publish(key, timestamp)
+
+    def presentedEvent(self, timestamp: int):
+        for callback in self.onPresented:
+            callback(timestamp)
+
+
+class SimulatedWindow:
+    def __init__(self) -> None:
+        self.events = SimulatedEvents()
+
+
+class SimulatedController:
+    # UIController 대체, 화면 대신 다음 timeout / 표시 시각만 기록
+    def __init__(self, target: SimulatedWindow, clock: VirtualClock, rng: random.Random, frame_time: int = 16666667) -> None:
+        self.target = target
+        self.clock = clock
+        self.rng = rng
+        self.frame_time = frame_time
+
+        self.deadline: Union[int, None] = None
+        self.presentation: Union[int, None] = None
+        self.shown: Union[Tuple[ExperimentType, Union[int, float]], None] = None
+
+        target.events.onTimeout.append(self.end_wait)
+
+    def move_window_to_target(self):
+        pass
+
+    def setInputFormVisible(self, visible: bool):
+        pass
+
+    def setGuideText(self, visible: bool, text: str = 'None'):
+        pass
+
+    def prewarm(self, exp_types: List[ExperimentType], test_sets: List[List]):
+        pass
+
+    def blink_log(self) -> Dict:
+        return {}
+
+    def hide_all(self):
+        self.shown = None
+        self.presentation = None
+
+    def start_timer(self, msec_time: int, random: int = 0):
+        if random != 0:
+            random = self.rng.randrange(-random, random)
+
+        self.deadline = self.clock.now + (msec_time + random) * 1000000
+
+    def end_wait(self):
+        self.deadline = None
+
+    def show_image_by_type(self, exp_type: ExperimentType, value: Union[int, float]):
+        self.shown = (exp_type, value)
+        # 다음 프레임에 표시된 것으로 처리
+        self.presentation = self.clock.now + self.rng.randrange(1, self.frame_time + 1)
+
+    def dispose(self):
+        self.target.events.onKeyPress.clear()
+        self.target.events.onTimeout.clear()
+        self.target.events.onPresented.clear()
+
+
+class SyntheticSubject:
+    # 반응 시간 = ex-Gaussian (정규분포 + 지수분포), 조건별 평균 이동은 condition_shift로 지정
+    def __init__(
+        self,
+        rng: random.Random,
+        mu: float = 0.45,
+        sigma: float = 0.05,
+        tau: float = 0.1,
+        miss_rate: float = 0.0,
+        condition_shift: Union[Callable[[ExperimentType, Union[int, float]], float], None] = None,
+    ) -> None:
+        self.rng = rng
+        self.mu = mu
+        self.sigma = sigma
+        self.tau = tau
+        self.miss_rate = miss_rate
+        self.condition_shift = condition_shift
+
+    def reaction_time(self, exp_type: ExperimentType, value: Union[int, float]) -> int:
+        seconds = self.rng.gauss(self.mu, self.sigma) + self.rng.expovariate(1 / self.tau)
+        if self.condition_shift is not None:
+            seconds += self.condition_shift(exp_type, value)
+        if self.rng.random() < self.miss_rate:
+            # 놓친 경우 다음 자극 전까지 반응하지 않다가 늦게 누름
+            seconds += 2.0
+        return max(1, int(seconds * 1000000000))
+
+
+class MemoryRecorder:
+    def __init__(self) -> None:
+        self.rows: List[Tuple] = []
+
+    def __call__(self, info: ExperimentInfo) -> None:
+        self.rows.append((info.name, info.exp_count, info.try_count, info.value, info.last_reaction_time))
+
+
+class NullOutput:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def run_session(
+    name: str,
+    subject: SyntheticSubject,
+    rng: random.Random,
+    recorder: Callable[[ExperimentInfo], None],
+    schedule: SessionSchedule,
+    operator_delay: int = 1000000000,
+    max_steps: int = 100000,
+) -> Experiment:
+    clock = VirtualClock()
+    window = SimulatedWindow()
+    controller = SimulatedController(window, clock, rng)
+    experiment = Experiment(window, name, controller=controller, clock=clock, recorder=recorder, schedule=schedule)
+
+    response: Union[int, None] = None
+    operator: Union[int, None] = None
+
+    for _ in range(max_steps):
+        if experiment.state == ExperimentPhase.EXPERIMENT_ENDED:
+            break
+
+        # 다음에 일어날 사건 예약
+        if experiment.state == ExperimentPhase.TEST_SET_READY and operator is None:
+            operator = clock.now + operator_delay
+
+        pending = [
+            (time_ns, kind) for time_ns, kind in [
+                (controller.presentation, 'present'),
+                (controller.deadline, 'timeout'),
+                (response, 'response'),
+                (operator, 'operator'),
+            ] if time_ns is not None
+        ]
+        if len(pending) == 0:
+            raise RuntimeError(f'Simulation stalled in {experiment.state}')
+
+        time_ns, kind = min(pending)
+        clock.now = max(clock.now, time_ns)
+
+        if kind == 'present':
+            # 피험자는 자극이 실제로 표시된 시점부터 반응
+            controller.presentation = None
+            window.events.presentedEvent(time_ns)
+            response = time_ns + subject.reaction_time(*controller.shown)
+        elif kind == 'timeout':
+            window.events.timeoutEvent()
+        elif kind == 'response':
+            response = None
+            window.events.keyPressEvent(Qt.Key.Key_End, time_ns)
+        else:
+            operator = None
+            window.events.keyPressEvent(Qt.Key.Key_End, time_ns)
+
+    return experiment
+
+
+def run_sessions(
+    count: int,
+    seed: int = 0,
+    recorder: Union[Callable[[ExperimentInfo], None], None] = None,
+    quiet: bool = True,
+    protocol: Union[Protocol, None] = None,
+) -> Dict[str, float]:
+    rng = random.Random(seed)
+    protocol = protocol if protocol is not None else load_protocol()
+    memory = MemoryRecorder()
+    recorder = recorder if recorder is not None else memory
+
+    level = logger.level
+    if quiet:
+        logger.setLevel(WARNING)
+
+    start = time.perf_counter()
+    virtual_time = 0
+    with redirect_stdout(NullOutput()) if quiet else nullcontext():
+        for index in range(count):
+            subject = SyntheticSubject(rng)
+            # 시행 순서는 파일로 저장하지 않고 피험자 번호로 바로 생성
+            schedule = compile_session(protocol, index, seed=f'{seed}-{index}')
+            experiment = run_session(f'sim-{index}', subject, rng, recorder, schedule)
+            virtual_time += experiment.clock.now
+    elapsed = time.perf_counter() - start
+
+    logger.setLevel(level)
+
+    result = {
+        'sessions': count,
+        'elapsed_s': elapsed,
+        'sessions_per_s': count / elapsed if elapsed > 0 else 0,
+        'virtual_time_s': virtual_time / 1000000000,
+    }
+    if recorder is memory:
+        reaction_times = [row[4] for row in memory.rows]
+        result['trials'] = len(reaction_times)
+        result['mean_rt_s'] = sum(reaction_times) / len(reaction_times) / 1000000000 if reaction_times else 0
+
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Virtual clock experiment simulation')
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--record', metavar='DIR', help='record trials through test_recorder into DIR')
+    args = parser.parse_args()
+
+    recorder = None
+    if args.record:
+        import test_recorder
+        from os.path import join
+
+        test_recorder.configure(args.record, join(args.record, 'result.xlsx'))
+        recorder = test_recorder.record
+
+    result = run_sessions(args.sessions, args.seed, recorder)
+
+    if args.record:
+        test_recorder.flush(None)
+        result['recorder'] = test_recorder.stats()
+
+    for key, value in result.items():
+        print(f'{key}: {value}')
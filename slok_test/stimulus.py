@@ -0,0 +1,105 @@
+from collections import OrderedDict, deque
+from typing import Deque, Tuple
+
+from PyQt5.QtCore import QPoint, Qt
+from PyQt5.QtGui import QColor, QPainter, QPixmap
+from PyQt5.QtWidgets import QWidget
+
+from slok_test.blink import FrameBlinkEngine
+
+
+class StimulusPixmapCache:
+    # (반지름, 밝기) 별로 미리 그려둔 원, 표시할 때는 복사만 수행
+    def __init__(self, max_size: int = 64) -> None:
+        self.max_size = max_size
+        self.pixmaps: 'OrderedDict[Tuple[int, int], QPixmap]' = OrderedDict()
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def get(self, radius: int, alpha: int) -> QPixmap:
+        key = (radius, alpha)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.hit_count += 1
+            self.pixmaps.move_to_end(key)
+            return pixmap
+
+        self.miss_count += 1
+        pixmap = self.render(radius, alpha)
+        self.pixmaps[key] = pixmap
+        if len(self.pixmaps) > self.max_size:
+            self.pixmaps.popitem(last=False)
+
+        return pixmap
+
+    def render(self, radius: int, alpha: int) -> QPixmap:
+        pixmap = QPixmap(radius * 2, radius * 2)
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        # 이전에 부모 창에 직접 그리던 것과 같은 방식
+        painter = QPainter(pixmap)
+        painter.setBrush(QColor(255, 255, 255, alpha))
+        painter.drawEllipse(QPoint(radius, radius), radius, radius)
+        painter.end()
+
+        return pixmap
+
+    def clear(self) -> None:
+        self.pixmaps.clear()
+
+
+pixmap_cache = StimulusPixmapCache()
+
+
+class CircleMixin:
+    # FlexibleCircle (raster), GLFlexibleCircle (OpenGL) 공통 동작
+    # QWidget 계열 클래스와 함께 상속하고 생성자에서 initializeCircle 호출
+    def initializeCircle(self, parent: QWidget, radius: int) -> None:
+        self.parent_window = parent
+        self.color = QColor(255, 255, 255, 255)
+        self.radius = 0
+        self.setSize(radius)
+        self.resetPosition()
+        self.setVisible(False)
+
+        self.blink_engine = FrameBlinkEngine(self)
+        self.blink_show = True
+        self.presentation_requested = False
+
+        # paint 소요 시간 (ns)
+        self.paint_times: Deque[int] = deque(maxlen=4096)
+
+    def resetPosition(self):
+        self.setPosition(
+            self.parent_window.width() // 2, 
+            self.parent_window.height() // 2
+        )
+
+    def setSize(self, radius: int):
+        prev_radius = self.radius
+        self.radius = radius
+        self.setFixedSize(radius * 2, radius * 2)
+        pos = self.pos()
+        self.setPosition(pos.x() + prev_radius, pos.y() + prev_radius)
+
+    def setPosition(self, x: int, y: int):
+        self.move(x - self.radius, y - self.radius)
+
+    def setBrightness(self, value: int):
+        self.color.setAlpha(value)
+
+    def setBlink(self, frequency: float):
+        self.blink_engine.stop()
+        self.blink_show = True
+
+        if frequency > 0:
+            self.frequency = frequency
+            self.blink_engine.start(frequency)
+
+    def blink(self):
+        self.blink_show = not self.blink_show
+        self.update()
+
+    def requestPresentation(self):
+        # 다음에 원이 실제로 그려지는 프레임을 onPresented로 알림
+        self.presentation_requested = True
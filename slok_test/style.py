@@ -0,0 +1,19 @@
+from typing import Dict
+
+from config_cache import load_cached
+
+STYLE_PATH = 'style.yaml'
+
+
+def compile_style(style_raw: Dict) -> Dict[str, str]:
+    # 위젯 이름 -> stylesheet 문자열
+    widget_styles: Dict[str, Dict] = style_raw['widgets']
+    return {
+        widget: '; '.join([f'{attr}: {value}' for attr, value in style.items()])
+        for widget, style in widget_styles.items()
+    }
+
+
+def load_style(path: str = STYLE_PATH) -> Dict[str, str]:
+    # style.yaml이 바뀌었을 때만 다시 변환
+    return load_cached(path, compile_style)
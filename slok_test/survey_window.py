@@ -5,6 +5,7 @@ from PyQt5.QtGui import QCloseEvent
 from PyQt5.QtWidgets import QHBoxLayout, QLabel, QPushButton, QVBoxLayout, QWidget
 
 from slok_test.controller import UIController
+from slok_test.logger import logger
 
 
 class SurveyWindow(QWidget):
@@ -22,7 +23,7 @@ class SurveyWindow(QWidget):
         self.last_button: Union[SurveyTestButton, None] = None
         self.before_last_button: Union[SurveyTestButton, None] = None
         self.need_to_run_last = False
-        controller.target.events.onKeyPress.append(self.run_last_action)
+        controller.target.events.onKeyPress.subscribe(self.run_last_action)
 
         vlayout = QVBoxLayout()
         vlayout.addSpacing(32)
@@ -34,7 +35,7 @@ class SurveyWindow(QWidget):
         hlayout.addWidget(label)
         button = QPushButton('0', self)
         button.clicked.connect(self.controller.hide_all)
-        button.clicked.connect(lambda: print('Off all'))
+        button.clicked.connect(lambda: logger.info('Off all'))
         hlayout.addWidget(button)
         hlayout.addStretch(1)
         hlayout.addSpacing(16)
@@ -86,11 +87,11 @@ class SurveyTestButton(QPushButton):
 
     def run_action(self):
         self.controller.show_image_by_type(self.type, self.value)
-        print(f'{self.type} [{self.value}]')
+        logger.info('%s [%s]', self.type, self.value)
 
         self.parent_window.before_last_button = self.parent_window.last_button
         self.parent_window.last_button = self
     
     def run_only_action(self):
         self.controller.show_image_by_type(self.type, self.value)
-        print(f'{self.type} [{self.value}]')
+        logger.info('%s [%s]', self.type, self.value)
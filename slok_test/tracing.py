@@ -0,0 +1,99 @@
+import json
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple, Union
+
+from slok_test.logger import LOG_DIR, logger
+
+
+def histogram(samples: List[int]) -> Dict:
+    # ns 단위 샘플 -> 통계 + log2 버킷 (us) 히스토그램
+    if len(samples) == 0:
+        return {'count': 0}
+
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    buckets: Dict[str, int] = {}
+    for sample in ordered:
+        bucket = f'<{1 << max(0, int(sample // 1000)).bit_length()}us'
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+
+    return {
+        'count': count,
+        'mean_us': sum(ordered) / count / 1000,
+        'p50_us': ordered[count // 2] / 1000,
+        'p99_us': ordered[min(count - 1, count * 99 // 100)] / 1000,
+        'max_us': ordered[-1] / 1000,
+        'histogram': buckets,
+    }
+
+
+class PhaseTracer:
+    # Experiment 상태 전환, timeout/anykey 동작 실행 시각과 각 동작의 실행 시간 기록
+    # 실험 중에는 정수만 리스트에 추가하고 통계/파일 저장은 save()에서 처리
+    def __init__(self, clock: Callable[[], int], enabled: bool = True) -> None:
+        self.clock = clock
+        self.enabled = enabled
+
+        # (시각, 이전 상태, 새 상태)
+        self.transitions: List[Tuple[int, str, str]] = []
+        self.phase_entered = 0
+        self.phase_durations: Dict[str, List[int]] = {}
+
+        # (시각, 'timeout' / 'anykey', 상태, 동작 이름)
+        self.dispatches: List[Tuple[int, str, str, str]] = []
+        # 입력 발생 (source timestamp) -> 동작 실행까지
+        self.input_latencies: List[int] = []
+        self.handler_durations: Dict[str, List[int]] = {}
+
+    def transition(self, old, new) -> None:
+        if not self.enabled:
+            return
+
+        now = self.clock()
+        if len(self.transitions) > 0:
+            self.phase_durations.setdefault(old.name, []).append(now - self.phase_entered)
+        self.phase_entered = now
+        self.transitions.append((now, old.name, new.name))
+
+    def dispatch(self, kind: str, phase, action: Callable[[], None], input_time: Union[int, None] = None) -> None:
+        if not self.enabled:
+            action()
+            return
+
+        name = getattr(action, '__name__', repr(action))
+        start = self.clock()
+        self.dispatches.append((start, kind, phase.name, name))
+        if input_time is not None:
+            self.input_latencies.append(start - input_time)
+
+        action()
+
+        self.handler_durations.setdefault(name, []).append(self.clock() - start)
+
+    def report(self) -> Dict:
+        return {
+            'handlers': {name: histogram(samples) for name, samples in self.handler_durations.items()},
+            'phases': {name: histogram(samples) for name, samples in self.phase_durations.items()},
+            'input_to_dispatch': histogram(self.input_latencies),
+        }
+
+    def save(self, name: str, log_dir: str = LOG_DIR) -> str:
+        report = self.report()
+        report['transitions'] = self.transitions
+        report['dispatches'] = self.dispatches
+
+        os.makedirs(log_dir, exist_ok=True)
+        path = os.path.join(log_dir, f"trace-{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+        for handler, stats in report['handlers'].items():
+            logger.info(
+                "Handler '%s': %d calls, mean %.1f us, p99 %.1f us, max %.1f us",
+                handler, stats['count'], stats['mean_us'], stats['p99_us'], stats['max_us']
+            )
+        logger.info('Phase trace saved: %s', path)
+
+        return path
@@ -1,32 +1,52 @@
-from typing import Dict, List, Callable
-from PyQt5.QtGui import QCloseEvent, QColor, QKeyEvent, QPaintEvent, QPainter, QMouseEvent
+import time
+from typing import Dict, List, Callable, Union
+from PyQt5.QtGui import QCloseEvent, QKeyEvent, QPaintEvent, QPainter, QMouseEvent
 
-import yaml
-from PyQt5.QtCore import QPoint, QTimer, Qt
+from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (
     QDesktopWidget, QHBoxLayout, QLabel, QLineEdit, QPushButton, QVBoxLayout, QWidget
 )
 
-import scaner.connector
+import test_recorder
+from slok_test.event_bus import FakeKeyEvent, KeyEventBus
+from slok_test.exp_setting import RENDER_BACKEND, SHARE_INPUT_PORT
+from slok_test.logger import logger
+from slok_test.scheduler import DeadlineLog, PreciseTimer
+from slok_test.stimulus import CircleMixin, pixmap_cache
+from slok_test.style import load_style
 
 
 class MainWindow(QWidget):
-    def __init__(self) -> None:
+    # target_screen이 None이면 모니터가 2개 이상일 때 1번, 아니면 0번 사용
+    # 여러 스테이션 실행 시 (station_launcher.py) 스테이션마다 모니터와 포트를 지정
+    # connector를 지정하면 직접 포트를 열지 않고 해당 입력 사용 (scaner.demux.SimulatorStream 등)
+    def __init__(self, target_screen: Union[int, None] = None, port: int = 2222, title: str = 'Visual Tester', connector=None) -> None:
         super().__init__()
         
         desktop = QDesktopWidget()
-        self.main_monitor = desktop.screenGeometry(0)
-        target = 0
-        if desktop.screenCount() > 1:
-            target = 1
+        if target_screen is None:
+            target = 0
+            if desktop.screenCount() > 1:
+                target = 1
+        else:
+            target = min(target_screen, desktop.screenCount() - 1)
         self.target_monitor = desktop.screenGeometry(target)
+        # 입력 화면은 실험 화면과 같은 모니터에 표시
+        self.main_monitor = desktop.screenGeometry(0) if target_screen is None else self.target_monitor
 
-        self.setWindowTitle('Visual Tester')
-        self.move(0, 0)
+        self.setWindowTitle(title)
+        self.move(self.main_monitor.left(), self.main_monitor.top())
         self.resize(self.main_monitor.width(), self.main_monitor.height())
         self.setWindowFlags(Qt.FramelessWindowHint)
 
-        self.image = FlexibleCircle(self)
+        # 이 창의 타이머 (실험 진행, 깜빡임) 기록
+        self.deadline_log = DeadlineLog(title)
+
+        if RENDER_BACKEND == 'opengl':
+            from slok_test.gl_circle import GLFlexibleCircle
+            self.image = GLFlexibleCircle(self)
+        else:
+            self.image = FlexibleCircle(self)
 
         self.guide_label = QLabel('', self)
         self.guide_label.setStyleSheet('font-size: 24pt; color: white')
@@ -35,7 +55,7 @@ class MainWindow(QWidget):
             self.width() // 2 - 120, self.height() // 2 - 100, 240, 64
         )
 
-        self.timer = QTimer()
+        self.timer = PreciseTimer('experiment', log=self.deadline_log)
 
         # 입력 부분 초기화
         self.widgets: Dict[str, QWidget] = {}
@@ -57,42 +77,39 @@ class MainWindow(QWidget):
         self.main_layout = hlayout
         self.setLayout(hlayout)
 
-        self.events = MainWindowEvents(self)
+        self.events = MainWindowEvents(self, port, connector)
 
         self.initializeStyle()
         self.show()
 
     def initializeStyle(self):
-        with open('style.yaml') as file:
-            style_raw = yaml.load(file, Loader=yaml.FullLoader)
+        self.setAutoFillBackground(True)
+        self.setStyleSheet('background-color: black')
 
-            self.setAutoFillBackground(True)
-            self.setStyleSheet('background-color: black')
-
-            widget_styles: Dict[str, Dict] = style_raw['widgets']
-            for widget, style in widget_styles.items():
-                style_text = '; '.join(
-                    [f'{attr}: {value}' for attr, value in style.items()])
-                self.widgets[widget].setStyleSheet(style_text)
+        for widget, style_text in load_style('style.yaml').items():
+            self.widgets[widget].setStyleSheet(style_text)
     
     def closeEvent(self, a0: QCloseEvent) -> None:
         self.events.scaner_connector.deactivate()
-        print('Main Window Closed')
-    
-    def paintEvent(self, a0: QPaintEvent) -> None:
-        self.image.draw()
+        test_recorder.flush()
+        logger.info('Main Window Closed')
+        logger.flush()
 
 
 class MainWindowEvents:
-    def __init__(self, parent: MainWindow) -> None:
+    def __init__(self, parent: MainWindow, port: int = 2222, connector=None) -> None:
         self.parent = parent
 
         self.onSubmit: List[Callable] = []
         self.onTimeout: List[Callable] = []
-        self.onKeyPress: List[Callable] = []
+        self.onKeyPress = KeyEventBus()
+        self.onPresented: List[Callable[[int], None]] = []
 
         # Scaner UDP Connector 초기화
-        self.scaner_connector = scaner.connector.QConnector(parent, debug=False)
+        if connector is None:
+            from scaner.connector import QConnector
+            connector = QConnector(parent, debug=False, port=port, share_port=SHARE_INPUT_PORT)
+        self.scaner_connector = connector
         self.scaner_connector.activate()
 
         self.parent.widgets['SubmitButton'].clicked.connect(self.submitEvent)
@@ -117,87 +134,48 @@ class MainWindowEvents:
             if callback() == True:
                 return
 
+    # 키보드 / 마우스 입력 시각은 이 핸들러가 실행된 시점 (Qt 이벤트 큐를 지난 뒤)
+    # QInputEvent.timestamp()는 창 시스템 기준 ms 단위 시각이라 perf_counter_ns와 비교할 수 없으므로 사용하지 않음
+    # 따라서 키보드 / 마우스 입력의 Queue Delay는 측정되지 않음 (항상 0에 가까움), SCANeR 입력만 측정됨
     def keyPressEvent(self, a0: QKeyEvent) -> None:
-        for callback in self.onKeyPress:
-            callback(a0)
+        self.onKeyPress.publish(a0.key(), time.perf_counter_ns())
 
     def mousePressEvent(self, a0: QMouseEvent) -> None:
-        for callback in self.onKeyPress:
-            arg = FakeKeyEvent()    # 문제가 될 수 있는 부분, 수정 필요
-            callback(arg)
-
-    def simulinkActivatedEvent(self, key: Qt.Key):
-        for callback in self.onKeyPress:
-            arg = FakeKeyEvent(key)    # 문제가 될 수 있는 부분, 수정 필요
-            callback(arg)
+        self.onKeyPress.publish(Qt.Key.Key_End, time.perf_counter_ns())
 
+    def simulinkActivatedEvent(self, key: Qt.Key, timestamp: int):
+        # timestamp는 QConnector에서 패킷을 받은 시점
+        self.onKeyPress.publish(key, timestamp)
 
-class FakeKeyEvent:
-    def __init__(self, key=Qt.Key.Key_End) -> None:
-        self.value = key
-        
-    def key(self):
-        return self.value
+    def presentedEvent(self, timestamp: int):
+        for callback in self.onPresented:
+            callback(timestamp)
 
 
-class FlexibleCircle(QWidget):
+class FlexibleCircle(CircleMixin, QWidget):
     def __init__(self, parent: MainWindow, radius: int = 127) -> None:
         super().__init__(parent)
-        self.parent_window = parent
-        self.color = QColor(255, 255, 255, 255)
-        self.radius = 0
-        self.setSize(radius)
-        self.resetPosition()
-        self.setVisible(False)
-
-        self.blink_timer = QTimer()
-        self.__blink_show = True
-        self.blink_timer.timeout.connect(self.blink)
-    
-    def resetPosition(self):
-        self.setPosition(
-            self.parent_window.width() // 2, 
-            self.parent_window.height() // 2
-        )
+        self.initializeCircle(parent, radius)
 
-    def setSize(self, radius: int):
-        prev_radius = self.radius
-        self.radius = radius
-        self.setFixedSize(radius * 2, radius * 2)
-        pos = self.pos()
-        self.setPosition(pos.x() + prev_radius, pos.y() + prev_radius)
-
-    def setPosition(self, x: int, y: int):
-        self.move(x - self.radius, y - self.radius)
-
-    def setBrightness(self, value: int):
-        self.color.setAlpha(value)
-
-    def setBlink(self, frequency: int):
-        self.blink_timer.stop()
-        self.__blink_show = True
-
-        if frequency > 0:
-            self.frequency = frequency
-
-            self.blink_timer.setInterval(int(1000 / frequency))
-            self.blink_timer.start()    # circle 이미지 클래스로 코드를 옮길 것
-
-    def blink(self):
-        if self.__blink_show:
-            # self.setFixedSize(0, 0)
-            self.__blink_show = False
-        else:
-            # self.setSize(self.radius)
-            self.__blink_show = True
-        
-        self.update()
-
-    def draw(self):
-        if self.isVisible() and self.__blink_show:
-            painter = QPainter(self.parent())
-            painter.setBrush(self.color)
-            painter.drawEllipse(self.pos() + QPoint(self.radius, self.radius), self.radius, self.radius)
+    def paintEvent(self, a0: QPaintEvent) -> None:
+        # 원 영역만 다시 그려짐, 원은 미리 그려둔 pixmap을 복사
+        if not self.blink_show:
+            self.blink_engine.presented(time.perf_counter_ns())
+            return
+
+        start = time.perf_counter_ns()
+
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, pixmap_cache.get(self.radius, self.color.alpha()))
+        painter.end()
+        self.paint_times.append(time.perf_counter_ns() - start)
+        self.blink_engine.presented(time.perf_counter_ns())
+
+        if self.presentation_requested:
+            # Raster 위젯은 swap 알림이 없으므로 자극이 포함된 프레임의 paint 완료 시점을 사용
+            # 이 paintEvent 직후 backing store가 화면으로 flush 됨
+            self.presentation_requested = False
+            self.parent_window.events.presentedEvent(time.perf_counter_ns())
 
         # 이미지 표시기 초기화
         # self.setStyleSheet('color: white; font-size: 36pt')
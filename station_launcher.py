@@ -0,0 +1,145 @@
+import argparse
+import multiprocessing
+import os
+import sys
+from os.path import join
+from typing import Dict, List
+
+import yaml
+
+# 한 PC에서 여러 스테이션 (모니터 + SCANeR 입력 + 피험자) 실행
+# 스테이션마다 별도 프로세스로 실행하여 한 스테이션의 작업이 다른 스테이션의 타이밍에 영향을 주지 않도록 함
+# 기록은 집계 프로세스 하나가 받아서 results/에 저장
+# python station_launcher.py [--config stations.yaml] [--only station-1] [--shared]
+
+
+def load_config(path: str) -> Dict:
+    with open(path, encoding='utf-8') as file:
+        return yaml.load(file, Loader=yaml.FullLoader)
+
+
+def load_stations(path: str, shared: bool = False) -> Dict[str, Dict]:
+    # --shared 실행에서는 port 대신 source 사용
+    stations: Dict[str, Dict] = load_config(path)['stations']
+    key = 'source' if shared else 'port'
+
+    missing = [name for name, station in stations.items() if key not in station]
+    if len(missing) > 0:
+        raise ValueError(f"Stations without '{key}': {missing}")
+
+    values = [station[key] for station in stations.values()]
+    if len(values) != len(set(values)):
+        raise ValueError(f'Station {key}s must be unique: {values}')
+
+    return stations
+
+
+def run_aggregator(queue, replies: Dict) -> None:
+    import test_recorder
+
+    test_recorder.serve(queue, replies=replies)
+
+
+def run_station(name: str, station: Dict, queue, reply_queue) -> None:
+    cpus: List[int] = station.get('cpus', [])
+    if len(cpus) > 0 and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+    import test_recorder
+    from slok_test.logger import LOG_DIR, logger
+
+    test_recorder.forward(queue, name, reply_queue)
+    # 같은 시각에 시작한 스테이션의 로그 파일이 섞이지 않도록 스테이션별 폴더 사용
+    logger.log_dir = join(LOG_DIR, name)
+
+    from PyQt5.QtWidgets import QApplication
+    from slok_test.exp_setting import RENDER_BACKEND, SHARE_INPUT_PORT, SOFTWARE_OPENGL
+    from slok_test.manager import initialize_experiment
+    from slok_test.window import MainWindow
+
+    if RENDER_BACKEND == 'opengl':
+        from slok_test.gl_circle import configure_opengl
+        configure_opengl(SOFTWARE_OPENGL)
+
+    app = QApplication(sys.argv)
+    window = MainWindow(station['screen'], station['port'], f'Visual Tester - {name}')
+    window.events.onSubmit.append(initialize_experiment)
+
+    app.exec_()
+
+
+def run_shared(stations: Dict[str, Dict], shared: Dict) -> None:
+    # 한 프로세스에서 스테이션별 창을 띄우고 입력은 포트 하나에서 source 기준으로 분배
+    # 프로세스 분리는 없으므로 PC 자원이 부족하면 스테이션별 프로세스 실행 권장
+    from PyQt5.QtWidgets import QApplication
+    from scaner.demux import DemuxConnector
+    from slok_test.exp_setting import RENDER_BACKEND, SOFTWARE_OPENGL
+    from slok_test.manager import initialize_experiment
+    from slok_test.window import MainWindow
+
+    if RENDER_BACKEND == 'opengl':
+        from slok_test.gl_circle import configure_opengl
+        configure_opengl(SOFTWARE_OPENGL)
+
+    app = QApplication(sys.argv)
+    receiver = DemuxConnector(
+        {name: station['source'] for name, station in stations.items()},
+        route=shared.get('route', 'address'),
+        port=shared.get('port', 2222),
+        share_port=SHARE_INPUT_PORT,
+    )
+
+    windows = []
+    for name, station in stations.items():
+        window = MainWindow(station['screen'], title=f'Visual Tester - {name}', connector=receiver.stream(name))
+        window.events.onSubmit.append(initialize_experiment)
+        windows.append(window)
+        print(f"Station '{name}': screen {station['screen']}, source {station['source']}")
+
+    app.exec_()
+    receiver.deactivate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run several experiment stations from one PC')
+    parser.add_argument('--config', default='stations.yaml')
+    parser.add_argument('--only', nargs='*', metavar='STATION', help='run only these stations')
+    parser.add_argument('--shared', action='store_true', help='run all stations in one process with one UDP port')
+    args = parser.parse_args()
+
+    stations = load_stations(args.config, args.shared)
+    if args.only:
+        stations = {name: station for name, station in stations.items() if name in args.only}
+
+    if args.shared:
+        run_shared(stations, load_config(args.config).get('shared', {}))
+        return
+
+    # Qt는 fork 이후 사용할 수 없으므로 모든 플랫폼에서 spawn 사용
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    # 스테이션별 응답 큐 (세션 종료 시 누적 통계 등)
+    replies = {name: context.Queue() for name in stations}
+
+    aggregator = context.Process(target=run_aggregator, args=(queue, replies), name='aggregator')
+    aggregator.start()
+
+    processes = []
+    for name, station in stations.items():
+        process = context.Process(target=run_station, args=(name, station, queue, replies[name]), name=name)
+        process.start()
+        processes.append(process)
+        print(f"Station '{name}': screen {station['screen']}, port {station['port']}, pid {process.pid}")
+
+    for process in processes:
+        process.join()
+        print(f"Station '{process.name}' exited ({process.exitcode})")
+
+    # 모든 스테이션이 종료된 후 남은 기록 저장, result.xlsx 내보내기
+    import test_recorder
+    queue.put(test_recorder.FORWARD_STOP)
+    aggregator.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,15 @@
+import atexit
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from os.path import isfile
-from openpyxl import load_workbook, Workbook
+from os.path import dirname, isfile, join
+from queue import Empty, Queue
+from typing import Callable, Deque, Dict, Iterator, List, Tuple, Union
+
+from recorder.journal import ShardedJournal, TrialJournal, export_xlsx, import_journal, import_xlsx
+from recorder.sqlite_store import SqliteStore
+from recorder.summary import SummaryStore
 
 
 class ExperimentInfo:
@@ -11,24 +20,463 @@ class ExperimentInfo:
         self.record_time = 0
         self.last_reaction_time = 0
         self.value = 0
+        self.queue_delay = 0
+        self.present_delay = 0
+
+
+RESULT_PATH = './result.xlsx'
+RESULT_DIR = './results'
+LEGACY_JOURNAL_PATH = './result_journal.csv'
+# 'sqlite': RESULT_DIR/results.db (WAL, 조회는 SqliteStore.trials), 'csv': RESULT_DIR에 피험자별 CSV
+RESULT_BACKEND = 'sqlite'
+RESULT_DB_NAME = 'results.db'
+# 피험자 / 조건별 누적 통계 (RESULT_DIR/summary/피험자.json), 기록할 때마다 갱신하고 내보내기 / flush 때 저장
+SUMMARY_DIR = 'summary'
+
+EXPORT_REQUEST = object()
+SAVE_REQUEST = object()
+# 프로세스 사이에서는 EXPORT_REQUEST 객체의 동일성이 유지되지 않으므로 문자열 사용
+FORWARD_EXPORT = '__export__'
+FORWARD_STOP = '__stop__'
+# 스테이션 -> 집계 프로세스 요청 (종류, 스테이션, 번호, 인자...), 결과는 스테이션별 응답 큐로 (번호, 결과)
+FORWARD_SUMMARY = '__summary__'
+FORWARD_FLUSH = '__flush__'
+# 이전 기록 옮기기가 실패하면 (xlsx 잠김 등) 기록은 계속하고 이 간격(초)마다 다시 시도
+MIGRATION_RETRY_INTERVAL = 60.0
+
+
+def open_store(result_dir: str, backend: str = RESULT_BACKEND) -> Union[SqliteStore, ShardedJournal]:
+    if backend == 'sqlite':
+        return SqliteStore(join(result_dir, RESULT_DB_NAME))
+    elif backend == 'csv':
+        return ShardedJournal(result_dir)
+    else:
+        raise ValueError(f'Unknown result backend: {backend}')
+
+
+def subject_rows(store: Union[SqliteStore, ShardedJournal], subject: str, after: int = 0) -> Iterator[Tuple[int, List]]:
+    # 한 피험자의 기록 중 번호가 after보다 큰 것 (번호, 행), 누적 통계를 저장소에 맞출 때 사용
+    # sqlite는 id, csv는 피험자 파일 안에서의 행 번호 (1부터)
+    if isinstance(store, SqliteStore):
+        return store.trials_after(subject, after)
+    if subject not in store.load_index():
+        return iter([])
+    return ((number, row) for number, row in enumerate(store.shard(subject).rows(), 1) if number > after)
+
+
+def last_row_id(store: Union[SqliteStore, ShardedJournal], subject: str) -> int:
+    if isinstance(store, SqliteStore):
+        return store.last_id(subject)
+    if subject not in store.load_index():
+        return 0
+    return sum(1 for _ in store.shard(subject).rows())
+
+
+class RecordWriter:
+    # GUI 스레드 대신 백그라운드에서 저널에 기록, result.xlsx는 요청 시 내보내기
+    def __init__(
+        self,
+        journal: Union[SqliteStore, ShardedJournal],
+        xlsx_path: str = RESULT_PATH,
+        batch_size: int = 64,
+        retry_interval: float = 1.0,
+        migrate: bool = True,
+        summary: Union[SummaryStore, None] = None,
+    ) -> None:
+        self.journal = journal
+        self.summary = summary
+        self.xlsx_path = xlsx_path
+        self.migrate = migrate
+        # (원본 이름, 옮기는 함수), 옮기기가 끝나면 None
+        self.migration: Union[Tuple[str, Callable[[], int]], None] = None
+        self.next_migration = 0.0
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+
+        self.queue: Queue = Queue()
+        self.pending: Deque = deque()
+
+        self.last_flush_latency = 0
+        self.max_flush_latency = 0
+        self.flush_count = 0
+        self.written_count = 0
+        self.written = 0
+
+        self.worker = threading.Thread(target=self.__run, name='RecordWriter', daemon=True)
+        self.worker.start()
+
+    def put(self, row: List) -> None:
+        self.queue.put(row)
+
+    def request_export(self) -> None:
+        self.queue.put(EXPORT_REQUEST)
+
+    def queue_depth(self) -> int:
+        return self.queue.unfinished_tasks
+
+    def flush(self, timeout: Union[float, None] = None) -> bool:
+        # 앞선 행을 모두 기록하고 누적 통계를 저장할 때까지 대기
+        self.queue.put(SAVE_REQUEST)
+        with self.queue.all_tasks_done:
+            return self.queue.all_tasks_done.wait_for(
+                lambda: self.queue.unfinished_tasks == 0, timeout)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'queue_depth': self.queue_depth(),
+            'written': self.written_count,
+            'flushes': self.flush_count,
+            'last_flush_ms': self.last_flush_latency / 1000000,
+            'max_flush_ms': self.max_flush_latency / 1000000,
+        }
+
+    def __run(self) -> None:
+        if self.migrate:
+            # 새 행을 기록하기 전에 옮길 대상을 정해둠, 실패하면 기록 중에 다시 시도
+            try:
+                self.migration = self.__find_migration()
+            except Exception as e:
+                print(f'Recorder: cannot check previous records ({e})')
+
+        while True:
+            self.__try_migration()
+            try:
+                # 기록 실패한 행이 있으면 주기적으로 재시도
+                timeout = self.retry_interval if len(self.pending) > 0 else None
+                self.pending.append(self.queue.get(timeout=timeout))
+                while len(self.pending) < self.batch_size:
+                    self.pending.append(self.queue.get_nowait())
+            except Empty:
+                pass
+
+            start = time.perf_counter_ns()
+            self.written = 0
+            try:
+                if getattr(self.journal, 'transactional', False):
+                    self.__write_transaction()
+                else:
+                    self.__write_rows()
+            except Exception as e:
+                print(f'Recorder: write failed ({e}), retrying...')
+                continue
+            finally:
+                self.written_count += self.written
+
+            latency = time.perf_counter_ns() - start
+            self.last_flush_latency = latency
+            self.max_flush_latency = max(self.max_flush_latency, latency)
+            self.flush_count += 1
+
+    def __write_rows(self) -> None:
+        # 한 행씩 기록 후 fsync
+        while len(self.pending) > 0:
+            item = self.pending[0]
+            if item is EXPORT_REQUEST or item is SAVE_REQUEST:
+                self.__request(item)
+            else:
+                self.__load_summary(item)
+                self.journal.append(item)
+                self.__update_summary(item)
+                self.written += 1
+            self.pending.popleft()
+            self.queue.task_done()
+
+    def __write_transaction(self) -> None:
+        # 묶음 전체를 한 트랜잭션으로 기록, 실패하면 rollback 후 같은 행을 다시 시도
+        staged = 0
+        try:
+            for item in list(self.pending):
+                if item is EXPORT_REQUEST or item is SAVE_REQUEST:
+                    # 내보내기 / 저장 전에 앞선 행을 먼저 기록
+                    self.__commit(staged)
+                    staged = 0
+                    self.__request(item)
+                    self.pending.popleft()
+                    self.queue.task_done()
+                else:
+                    self.__load_summary(item)
+                    self.journal.append(item, sync=False)
+                    staged += 1
+            self.__commit(staged)
+        except Exception:
+            self.journal.discard()
+            raise
+
+    def __commit(self, staged: int) -> None:
+        self.journal.sync()
+        for _ in range(staged):
+            self.__update_summary(self.pending.popleft())
+            self.queue.task_done()
+        self.written += staged
+
+    def __load_summary(self, row: List) -> None:
+        # 기존 기록으로 계산하는 경우 이번 행이 포함되지 않도록 기록 전에 읽음
+        if self.summary is not None:
+            try:
+                self.summary.load(str(row[0]))
+            except Exception as e:
+                print(f'Recorder: summary load failed ({e})')
+
+    def __update_summary(self, row: List) -> None:
+        # 이미 기록된 행이므로 실패해도 기록을 다시 시도하지 않음
+        if self.summary is not None:
+            try:
+                self.summary.update(row)
+            except Exception as e:
+                print(f'Recorder: summary update failed ({e})')
+
+    def __save_summary(self) -> None:
+        if self.summary is None:
+            return
+        try:
+            self.summary.save()
+        except Exception as e:
+            # 기록에서 다시 계산할 수 있으므로 다음 저장 때 재시도
+            print(f'Recorder: summary save failed ({e})')
+
+    def __request(self, item) -> None:
+        self.__save_summary()
+        if item is EXPORT_REQUEST:
+            self.__export()
+
+    def __export(self) -> None:
+        try:
+            count = export_xlsx(self.journal, self.xlsx_path)
+            print(f'Recorder: {count} rows exported to {self.xlsx_path}')
+        except Exception as e:
+            # 저널이 원본이므로 내보내기 실패는 재시도하지 않음
+            print(f'Recorder: export failed ({e})')
+
+    def __find_migration(self) -> Union[Tuple[str, Callable[[], int]], None]:
+        # 현재 저장 방식 도입 이전의 기록을 한 번만 옮김
+        if self.journal.exists():
+            return None
+
+        csv_journal = ShardedJournal(dirname(self.journal.path)) if isinstance(self.journal, SqliteStore) else None
+        if csv_journal is not None and csv_journal.exists():
+            return csv_journal.root, lambda: import_journal(self.journal, csv_journal)
+        elif isfile(LEGACY_JOURNAL_PATH):
+            return LEGACY_JOURNAL_PATH, lambda: import_journal(self.journal, TrialJournal(LEGACY_JOURNAL_PATH))
+        elif isfile(self.xlsx_path):
+            return self.xlsx_path, lambda: import_xlsx(self.journal, self.xlsx_path)
+        return None
+
+    def __try_migration(self) -> None:
+        if self.migration is None or time.monotonic() < self.next_migration:
+            return
+
+        source, migrate = self.migration
+        try:
+            count = migrate()
+        except Exception as e:
+            # 옮기던 행은 버리고 (sqlite) 다음에 처음부터 다시 시도, 그 사이 기록은 계속
+            if hasattr(self.journal, 'discard'):
+                self.journal.discard()
+            self.next_migration = time.monotonic() + MIGRATION_RETRY_INTERVAL
+            print(f'Recorder: import from {source} failed ({e}), retrying in {MIGRATION_RETRY_INTERVAL:.0f} s')
+            return
+
+        self.migration = None
+        print(f'Recorder: {count} rows imported from {source}')
+        if self.summary is not None:
+            # 옮긴 기록은 다음에 읽을 때 반영
+            self.summary.reset()
+
+
+class RecordForwarder:
+    # 여러 스테이션 실행 시 (station_launcher.py) 각 스테이션 프로세스의 기록을 집계 프로세스로 전달
+    # 파일 기록은 집계 프로세스의 RecordWriter가 담당하므로 스테이션에서는 큐에 넣기만 함
+    # 누적 통계 등 집계 프로세스의 결과가 필요한 요청은 replies 큐로 응답을 받음
+    def __init__(self, queue, station: str, replies=None) -> None:
+        self.queue = queue
+        self.station = station
+        self.replies = replies
+        self.forwarded_count = 0
+        self.request_count = 0
+
+    def put(self, row: List) -> None:
+        self.queue.put(row)
+        self.forwarded_count += 1
 
+    def request_export(self) -> None:
+        self.queue.put(FORWARD_EXPORT)
 
-target_book: Workbook = None
-if isfile('./result.xlsx'):
-    target_book = load_workbook('./result.xlsx')
-else:
-    target_book = Workbook()
+    def queue_depth(self) -> int:
+        return 0
+
+    def flush(self, timeout: Union[float, None] = None) -> bool:
+        # 집계 프로세스가 이 스테이션에서 보낸 행을 모두 기록할 때까지 대기
+        if self.replies is None:
+            return True
+        return self.request(FORWARD_FLUSH, timeout=timeout) is True
+
+    def summary(self, subject: str, timeout: Union[float, None] = 5.0) -> Dict:
+        result = self.request(FORWARD_SUMMARY, subject, timeout=timeout)
+        return result if result is not None else {}
+
+    def request(self, kind: str, *args, timeout: Union[float, None] = 5.0):
+        # 응답이 없으면 None, 시간이 지난 뒤 도착한 이전 요청의 응답은 버림
+        if self.replies is None:
+            return None
+
+        self.request_count += 1
+        token = self.request_count
+        self.queue.put((kind, self.station, token) + args)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                reply_token, result = self.replies.get(timeout=remaining)
+            except Empty:
+                print(f'Recorder: no reply from the aggregator for {kind}')
+                return None
+            if reply_token == token:
+                return result
+
+    def stats(self) -> Dict[str, float]:
+        return {'station': self.station, 'forwarded': self.forwarded_count}
+
+
+writer: Union[RecordWriter, RecordForwarder, None] = None
+
+
+def open_writer(result_dir: str, xlsx_path: str, migrate: bool = True) -> RecordWriter:
+    store = open_store(result_dir)
+    summary_store = SummaryStore(
+        join(result_dir, SUMMARY_DIR),
+        lambda subject, after: subject_rows(store, subject, after),
+        lambda subject: last_row_id(store, subject),
+    )
+    return RecordWriter(store, xlsx_path, migrate=migrate, summary=summary_store)
+
+
+def get_writer() -> RecordWriter:
+    # 첫 시행 기록 중에 만들지 않도록 프로그램 시작 시 호출 (main.py)
+    global writer
+    if writer is None:
+        writer = open_writer(RESULT_DIR, RESULT_PATH)
+    return writer
+
+
+def configure(result_dir: str, xlsx_path: str, migrate: bool = False) -> None:
+    # 기록 위치 변경 (벤치마크, 시뮬레이션 등), 이전 위치에 남은 기록은 먼저 저장
+    global writer
+    flush(None)
+    writer = open_writer(result_dir, xlsx_path, migrate)
+
+
+def forward(queue, station: str, replies=None) -> None:
+    # 이 프로세스의 기록을 집계 프로세스(serve)로 보냄
+    global writer
+    writer = RecordForwarder(queue, station, replies)
+
+
+def answer(request: tuple, replies: Dict) -> None:
+    # 집계 프로세스에서 스테이션 요청 처리, 앞서 받은 행을 모두 기록한 뒤 응답
+    kind, station, token = request[:3]
+    writer.flush(None)
+    if kind == FORWARD_FLUSH:
+        result = True
+    elif kind == FORWARD_SUMMARY:
+        result = writer.summary.report(request[3]) if writer.summary is not None else {}
+    else:
+        result = None
+        print(f'Recorder: unknown request {kind} from {station}')
+
+    if station in replies:
+        replies[station].put((token, result))
+
+
+def serve(queue, result_dir: str = RESULT_DIR, xlsx_path: str = RESULT_PATH, replies: Union[Dict, None] = None) -> None:
+    # 집계 프로세스: FORWARD_STOP을 받을 때까지 스테이션들의 기록을 저장
+    # replies: 스테이션 이름 -> 응답 큐
+    global writer
+    writer = open_writer(result_dir, xlsx_path)
+
+    while True:
+        item = queue.get()
+        if isinstance(item, tuple):
+            answer(item, replies or {})
+        elif item == FORWARD_STOP:
+            break
+        elif item == FORWARD_EXPORT:
+            writer.request_export()
+        else:
+            writer.put(item)
+
+    writer.request_export()
+    flush(None)
 
 
 def record(info: ExperimentInfo):
     now = datetime.now()
-    
-    if info.name not in target_book.sheetnames:
-        target_book.create_sheet(info.name, 0)
-        sheet = target_book[info.name]
-        sheet.append(['Name', 'Date Time', 'Experiment', 'Try', 'Time', 'Reaction Interval', 'Value'])
 
-    sheet = target_book[info.name]
-    sheet.append([info.name, now.strftime('%Y-%m-%d %H:%M:%S'), info.exp_count, info.try_count, info.record_time, info.last_reaction_time / 1000000000, info.value])
+    # info는 이후 시행에서 계속 바뀌므로 호출 시점의 값을 복사해서 넘김
+    get_writer().put([
+        info.name, now.strftime('%Y-%m-%d %H:%M:%S'), info.exp_count, info.try_count,
+        info.record_time, info.last_reaction_time / 1000000000, info.value,
+        info.queue_delay / 1000000000, info.present_delay / 1000000000
+    ])
+
+
+def export():
+    get_writer().request_export()
+
+
+def flush(timeout: Union[float, None] = 5.0) -> bool:
+    if writer is None:
+        return True
+
+    done = writer.flush(timeout)
+    if not done:
+        print(f'Recorder: {writer.queue_depth()} rows are not saved yet')
+    return done
+
+
+def trials(subject: Union[str, None] = None, exp_type=None, value: Union[int, float, None] = None, since: Union[str, None] = None):
+    # 저장된 시행 조회 (sqlite 저장 방식), 행은 HEADER 순서
+    store = writer.journal if isinstance(writer, RecordWriter) else open_store(RESULT_DIR)
+    if not isinstance(store, SqliteStore):
+        raise RuntimeError('Trial queries need the sqlite result backend')
+    return store.trials(subject, exp_type, value, since)
+
+
+def last_trial(subject: str, since: Union[str, None] = None) -> Union[List, None]:
+    # 피험자의 마지막 시행 (HEADER 순서), 중단된 세션을 이어서 진행할 위치를 찾을 때 사용
+    # 스테이션 프로세스에서는 집계 프로세스가 기록을 마친 뒤 같은 저장소를 읽기 전용으로 조회
+    flush()
+    store = writer.journal if isinstance(writer, RecordWriter) else open_store(RESULT_DIR)
+    if isinstance(store, SqliteStore):
+        return store.latest(subject, since)
+
+    last = None
+    for _, row in subject_rows(store, subject):
+        if since is None or str(row[1]) >= since:
+            last = row
+    return last
+
+
+def summary(subject: str) -> Dict:
+    # 피험자의 누적 통계 {실험 종류: {값: {count, mean, sd, min, max, p50, p90}}}
+    if isinstance(writer, RecordWriter) and writer.summary is not None:
+        return writer.summary.report(subject)
+    if isinstance(writer, RecordForwarder):
+        # 스테이션 프로세스에서는 기록을 가진 집계 프로세스에 요청
+        return writer.summary(subject)
+    return SummaryStore(join(RESULT_DIR, SUMMARY_DIR)).report(subject)
+
+
+def stats() -> Dict[str, float]:
+    if writer is None:
+        return {'queue_depth': 0, 'written': 0, 'flushes': 0, 'last_flush_ms': 0, 'max_flush_ms': 0}
+    return writer.stats()
+
+
+atexit.register(flush)
+
 
-    target_book.save('./result.xlsx')
\ No newline at end of file
+if __name__ == '__main__':
+    # python test_recorder.py : 저널에서 result.xlsx 재생성
+    export()
+    flush(None)
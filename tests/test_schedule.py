@@ -0,0 +1,81 @@
+import random
+from array import array
+
+import pytest
+
+from slok_test.exp_setting import ExperimentType
+from slok_test.schedule import (
+    Protocol, SessionSchedule, balanced_latin_square, compile_session, constrained_order,
+    prepare_schedule, resume_index
+)
+
+
+def make_protocol() -> Protocol:
+    return Protocol({
+        'blocks': ['LUMINANCE', 'SIZE'],
+        'trials_per_block': 8,
+        'max_run': 2,
+        'values': {'LUMINANCE': [1, 2, 3, 4], 'SIZE': [5, 6]},
+        'stand_by': {'time': 1000, 'jitter': 0},
+    })
+
+
+def test_constrained_order_balances_values_and_limits_runs():
+    for seed in range(20):
+        order = constrained_order(12, 3, 2, random.Random(seed))
+        assert sorted(order) == [0] * 4 + [1] * 4 + [2] * 4
+        runs = [order[index:index + 3] for index in range(len(order) - 2)]
+        assert all(len(set(run)) > 1 for run in runs)
+
+
+def test_constrained_order_impossible():
+    with pytest.raises(ValueError):
+        constrained_order(4, 1, 2, random.Random(0))
+
+
+def test_balanced_latin_square_positions():
+    square = balanced_latin_square(4)
+    for position in range(4):
+        assert sorted(row[position] for row in square) == [0, 1, 2, 3]
+
+
+def test_block_range():
+    schedule = compile_session(make_protocol(), 0)
+    assert len(schedule) == 16
+    assert schedule.block_range(0) == (0, 8)
+    assert schedule.block_range(5) == (0, 8)
+    assert schedule.block_range(8) == (8, 16)
+    assert schedule.block_range(15) == (8, 16)
+
+
+def test_resume_index():
+    schedule = SessionSchedule(
+        [ExperimentType.SIZE, ExperimentType.LUMINANCE],
+        {ExperimentType.SIZE: [5], ExperimentType.LUMINANCE: [1]},
+        array('i', [0, 0, 0, 0, 0, 1, 0, 0, 1, 0, 0, 0, 1, 1, 0, 0]),
+    )
+    assert resume_index(schedule, None) == 0
+    # HEADER 순서: 이름, 시각, 실험 종류, 시행 번호, ...
+    assert resume_index(schedule, ['a', '', 'SIZE', 0]) == 1
+    assert resume_index(schedule, ['a', '', 'SIZE', 1]) == 2
+    assert resume_index(schedule, ['a', '', 'LUMINANCE', 1]) == 4
+    # 순서에 없는 기록이면 처음부터
+    assert resume_index(schedule, ['a', '', 'BLINK', 0]) == 0
+
+
+def test_prepare_schedule_resumes_only_unfinished(tmp_path):
+    protocol_path = tmp_path / 'protocol.yaml'
+    protocol_path.write_text('trials_per_block: 4\n')
+    schedule_dir = str(tmp_path / 'schedules')
+
+    first, start = prepare_schedule('kim', schedule_dir, str(protocol_path))
+    assert start == 0
+
+    resumed, start = prepare_schedule('kim', schedule_dir, str(protocol_path), completed=lambda saved: 3)
+    assert start == 3 and resumed.subject_index == first.subject_index
+
+    # 끝난 세션, 이어서 하지 않는 경우는 새 순서
+    finished, start = prepare_schedule('kim', schedule_dir, str(protocol_path), completed=len)
+    assert start == 0 and finished.subject_index != first.subject_index
+    fresh, start = prepare_schedule('kim', schedule_dir, str(protocol_path))
+    assert start == 0 and fresh.subject_index != finished.subject_index
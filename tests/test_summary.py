@@ -0,0 +1,76 @@
+import random
+import statistics
+
+from recorder.summary import EXACT_LIMIT, P2Quantile, RunningStats, SummaryStore
+
+
+def reference(data, p):
+    # statistics.quantiles는 2개 이상일 때 p = 1/100 ~ 99/100 분위수
+    return statistics.quantiles(data, n=100, method='inclusive')[round(p * 100) - 1]
+
+
+def test_exact_quantiles_for_small_samples():
+    rng = random.Random(0)
+    for count in range(2, EXACT_LIMIT + 1):
+        data = [rng.uniform(0.15, 0.6) for _ in range(count)]
+        for p in [0.5, 0.9]:
+            sketch = P2Quantile(p)
+            for x in data:
+                sketch.add(x)
+            assert abs(sketch.value() - reference(data, p)) < 1e-12
+
+
+def test_small_integer_sequences():
+    sketch = P2Quantile(0.9)
+    for x in range(1, 6):
+        sketch.add(x)
+    assert sketch.value() == reference(range(1, 6), 0.9)
+
+    for x in range(6, 9):
+        sketch.add(x)
+    assert sketch.value() == reference(range(1, 9), 0.9)
+
+
+def test_estimate_after_exact_limit():
+    rng = random.Random(1)
+    data = [rng.gauss(0.3, 0.05) for _ in range(2000)]
+    stats = RunningStats()
+    for x in data:
+        stats.add(x)
+
+    report = stats.report()
+    assert abs(report['p50'] - statistics.median(data)) < 0.01
+    assert abs(report['p90'] - reference(data, 0.9)) < 0.01
+
+
+def test_round_trip_keeps_samples():
+    stats = RunningStats()
+    for x in [0.2, 0.4, 0.3]:
+        stats.add(x)
+
+    restored = RunningStats.from_dict(stats.to_dict())
+    restored.add(0.5)
+    assert restored.report()['p50'] == reference([0.2, 0.3, 0.4, 0.5], 0.5)
+
+
+def test_summary_catches_up_with_rows_saved_after_the_file(tmp_path):
+    rows = []
+
+    def source(subject, after):
+        return [(number, row) for number, row in enumerate(rows, 1) if number > after and row[0] == subject]
+
+    def open_store():
+        return SummaryStore(str(tmp_path), source, lambda subject: len(rows))
+
+    summary = open_store()
+    for _ in range(3):
+        summary.load('kim')
+        rows.append(['kim', '', 'SIZE', 0, 0, 0.3, 3])
+        summary.update(rows[-1])
+    summary.save()
+
+    # 저장 전에 비정상 종료: 기록은 남았지만 누적 통계 파일에는 반영되지 않음
+    for _ in range(5):
+        rows.append(['kim', '', 'SIZE', 0, 0, 0.3, 3])
+
+    assert open_store().report('kim')['SIZE']['3']['count'] == 8